@@ -5,3 +5,6 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Проверка постоянных соединений перед каждым запросом.
+from backend import db  # noqa: E402,F401
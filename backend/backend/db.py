@@ -0,0 +1,27 @@
+"""Проверка постоянных соединений с базой данных.
+
+В Django 3.2 нет настройки CONN_HEALTH_CHECKS (появилась в 4.1): при
+CONN_MAX_AGE > 0 соединение, разорванное сервером или PgBouncer между
+запросами, обнаруживается только ошибкой в первом запросе. Здесь перед
+каждым запросом сохранённые соединения проверяются и при необходимости
+закрываются, чтобы Django открыл новое.
+"""
+from django.core.signals import request_started
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        if (
+            connection.connection is None
+            or not settings_dict.get('CONN_HEALTH_CHECKS')
+            or settings_dict['CONN_MAX_AGE'] == 0
+            or connection.in_atomic_block
+        ):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+request_started.connect(close_unusable_connections)
@@ -0,0 +1,106 @@
+"""Метрики в формате Prometheus.
+
+При запуске под gunicorn каждый воркер пишет значения в файлы каталога
+PROMETHEUS_MULTIPROC_DIR, а /api/metrics (backend/views.py) собирает
+их со всех воркеров (см. gunicorn.conf.py). Без этой переменной
+отдаются метрики текущего процесса.
+"""
+import os
+import resource
+from contextlib import ExitStack
+from timeit import default_timer
+
+from django.db import connections
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, multiprocess)
+
+REQUESTS = Counter(
+    'http_requests_total', 'Обработанные HTTP-запросы.',
+    ('method', 'route', 'status')
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса.',
+    ('method', 'route'),
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+    )
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Число SQL-запросов на HTTP-запрос.',
+    ('method', 'route'),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'HTTP-запросы в обработке.',
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Обращения к кэшам приложения.',
+    ('cache', 'result')
+)
+TASK_QUEUE_DEPTH = Gauge(
+    'task_queue_depth', 'Фоновые задачи в очереди и в работе.',
+    multiprocess_mode='livesum'
+)
+WORKERS = Gauge(
+    'server_workers', 'Живые процессы-воркеры.',
+    multiprocess_mode='livesum'
+)
+WORKER_MAX_RSS = Gauge(
+    'server_worker_max_rss_bytes', 'Пиковая память воркера.',
+    multiprocess_mode='liveall'
+)
+# Ряд на каждый живой воркер (метку pid добавляет MultiProcessCollector),
+# ряды завершившихся воркеров убирает child_exit в gunicorn.conf.py.
+WORKER_REQUESTS = Gauge(
+    'server_worker_requests', 'Запросы, обработанные живым воркером.',
+    multiprocess_mode='liveall'
+)
+
+WORKERS.set(1)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = default_timer()
+        with REQUESTS_IN_PROGRESS.track_inprogress(), ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = default_timer() - started
+
+        # Имя маршрута, а не путь: иначе число рядов метрик не ограничено.
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        REQUESTS.labels(request.method, route, response.status_code).inc()
+        REQUEST_DURATION.labels(request.method, route).observe(duration)
+        REQUEST_QUERIES.labels(request.method, route).observe(
+            counter.queries
+        )
+        WORKER_REQUESTS.inc()
+        # ru_maxrss в Linux - в килобайтах.
+        WORKER_MAX_RSS.set(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        )
+        return response
@@ -0,0 +1,179 @@
+"""Профилирование запросов.
+
+ProfilingMiddleware (включается PROFILING=True) считает для каждого
+запроса число и время SQL-запросов, время сериализации и размер ответа,
+отдаёт их в заголовке Server-Timing и пишет строкой JSON в лог
+backend.profiling. Повторяющиеся SQL-запросы одного вида (N+1)
+логируются предупреждением, а раз в PROFILING_REPORT_INTERVAL секунд
+в лог выводится топ самых медленных адресов.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from threading import Lock
+from timeit import default_timer
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+current_profile = ContextVar('current_profile', default=None)
+
+SQL_PLACEHOLDERS = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0
+        self.templates = Counter()
+        self.serializer_time = 0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = default_timer()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += default_timer() - started
+            self.queries += 1
+            # IN (%s, %s, ...) разной длины - один и тот же запрос.
+            self.templates[SQL_PLACEHOLDERS.sub('%s, ...', sql)] += 1
+
+
+def timed_data(data):
+    def wrapper(self):
+        profile = current_profile.get()
+        if profile is None:
+            return data(self)
+        # Вложенные .data (сериализатор внутри SerializerMethodField)
+        # уже входят во время внешнего.
+        profile.serializer_depth += 1
+        started = default_timer()
+        try:
+            return data(self)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += default_timer() - started
+
+    wrapper.profiled = True
+    return property(wrapper)
+
+
+class EndpointStats:
+    """Статистика по адресам за период между отчётами."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = default_timer()
+        self.endpoints = {}
+
+    def add(self, endpoint, duration, queries):
+        with self.lock:
+            count, total, slowest, total_queries = self.endpoints.get(
+                endpoint, (0, 0, 0, 0)
+            )
+            self.endpoints[endpoint] = (
+                count + 1,
+                total + duration,
+                max(slowest, duration),
+                total_queries + queries,
+            )
+            if (
+                default_timer() - self.started
+                < settings.PROFILING_REPORT_INTERVAL
+            ):
+                return
+            endpoints, period = self.endpoints, default_timer() - self.started
+            self.reset()
+        self.report(endpoints, period)
+
+    @staticmethod
+    def report(endpoints, period):
+        top = sorted(
+            endpoints.items(), key=lambda item: item[1][1], reverse=True
+        )[:settings.PROFILING_REPORT_SIZE]
+        logger.info(json.dumps({
+            'event': 'slow_endpoints',
+            'period_s': round(period),
+            'endpoints': [
+                {
+                    'endpoint': endpoint,
+                    'requests': count,
+                    'total_ms': round(total * 1000, 1),
+                    'mean_ms': round(total / count * 1000, 1),
+                    'max_ms': round(slowest * 1000, 1),
+                    'mean_queries': round(queries / count, 1),
+                }
+                for endpoint, (count, total, slowest, queries) in top
+            ],
+        }, ensure_ascii=False))
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.stats = EndpointStats()
+        if not hasattr(BaseSerializer.data.fget, 'profiled'):
+            BaseSerializer.data = timed_data(BaseSerializer.data.fget)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        started = default_timer()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        duration = default_timer() - started
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={profile.sql_time * 1000:.1f};'
+            f'desc="{profile.queries} queries"',
+            f'serializer;dur={profile.serializer_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+
+        match = request.resolver_match
+        endpoint = f'{request.method} {match.route if match else request.path}'
+        duplicates = {
+            sql: count for sql, count in profile.templates.items()
+            if count >= settings.PROFILING_DUPLICATE_THRESHOLD
+        }
+        logger.info(json.dumps({
+            'event': 'request',
+            'endpoint': endpoint,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 1),
+            'db_queries': profile.queries,
+            'db_ms': round(profile.sql_time * 1000, 1),
+            'serializer_ms': round(profile.serializer_time * 1000, 1),
+            'response_bytes': (
+                None if response.streaming else len(response.content)
+            ),
+        }, ensure_ascii=False))
+        if duplicates:
+            logger.warning(json.dumps({
+                'event': 'duplicate_queries',
+                'endpoint': endpoint,
+                'queries': duplicates,
+            }, ensure_ascii=False))
+
+        self.stats.add(endpoint, duration, profile.queries)
+        return response
@@ -0,0 +1,109 @@
+"""Чтение с реплик базы данных.
+
+Безопасные запросы (GET, HEAD, OPTIONS) читают с реплик, всё остальное -
+с основной базы. После записи клиент с токеном на REPLICA_PIN_SECONDS
+закрепляется за основной базой, чтобы не увидеть устаревшие данные
+из-за отставания реплики. Закрепление хранится в кэше и должно быть
+видно всем воркерам, поэтому реплики работают только с общим кэшем
+(SHARED_CACHE).
+"""
+import random
+from contextvars import ContextVar
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+use_replica = ContextVar('use_replica', default=False)
+
+# Токен читается сразу после входа, до того как он дойдёт до реплики.
+PRIMARY_APPS = {'authtoken'}
+
+
+def get_replicas():
+    return [
+        alias for alias, settings_dict in settings.DATABASES.items()
+        if settings_dict.get('TEST', {}).get('MIRROR') == DEFAULT_DB_ALIAS
+    ]
+
+
+def require_shared_cache():
+    if get_replicas() and not settings.SHARED_CACHE:
+        raise ImproperlyConfigured(
+            'Для чтения с реплик нужен общий кэш (CACHE_BACKEND): '
+            'иначе запрос, попавший в другой воркер, не видит '
+            'закрепления за основной базой.'
+        )
+
+
+class ReplicaRouter:
+    def __init__(self):
+        require_shared_cache()
+
+    def db_for_read(self, model, **hints):
+        if (
+            not use_replica.get()
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = get_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def get_pin_key(request):
+    # Анонимных клиентов за прокси не различить по REMOTE_ADDR, а их
+    # записи (регистрация, вход) не читаются следом с реплики: токен
+    # берётся из основной базы (PRIMARY_APPS).
+    client = request.META.get('HTTP_AUTHORIZATION')
+    if not client:
+        return None
+    return f'db:primary:{md5(client.encode()).hexdigest()}'
+
+
+def pin_to_primary(request):
+    key = get_pin_key(request)
+    if key is not None:
+        cache.set(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    key = get_pin_key(request)
+    return key is not None and bool(cache.get(key))
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        require_shared_cache()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            # Закрепляем и до, и после записи: параллельные запросы того же
+            # клиента тоже должны читать с основной базы.
+            pin_to_primary(request)
+            try:
+                return self.get_response(request)
+            finally:
+                pin_to_primary(request)
+        token = use_replica.set(not is_pinned(request))
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
@@ -1,5 +1,5 @@
 import os
-
+from datetime import datetime
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -32,7 +32,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
+    'backend.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'backend.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,10 +71,146 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Постоянные соединения: сколько секунд держать соединение
+        # между запросами (0 - закрывать после каждого запроса).
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # Перед запросом проверять, что сохранённое соединение живо
+        # (см. backend/db.py: в Django 3.2 такой проверки нет).
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ) == 'True',
+        # За PgBouncer в режиме pool_mode=transaction серверные курсоры
+        # (QuerySet.iterator()) не переживают границу транзакции.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_PGBOUNCER', 'False'
+        ) == 'True',
+        'OPTIONS': {},
+    }
+}
+
+if 'postgresql' in (DATABASES['default']['ENGINE'] or ''):
+    DATABASES['default']['OPTIONS'].update({
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        'keepalives': 1,
+        'keepalives_idle': int(os.getenv('DB_KEEPALIVES_IDLE', 60)),
+    })
+
+# Реплики для чтения: DB_REPLICA_HOSTS - хосты PostgreSQL через запятую,
+# DB_REPLICA_NAMES - имена баз (например, файлы SQLite для локальной
+# проверки). Остальные параметры берутся из основной базы.
+REPLICAS = [
+    *(('HOST', host) for host in os.getenv('DB_REPLICA_HOSTS', '').split(',')),
+    *(('NAME', name) for name in os.getenv('DB_REPLICA_NAMES', '').split(',')),
+]
+for number, (key, value) in enumerate(
+    [(key, value.strip()) for key, value in REPLICAS if value.strip()], 1
+):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        key: value,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Сколько секунд после записи читать данные клиента с основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+
+# При нескольких воркерах нужен общий кэш (Redis, Memcached): с
+# локальным кэшем изменения доходят до других воркеров только по
+# истечении CACHE_VERSION_TIMEOUT.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
     }
 }
 
+# Кэши, не общие для процессов: у каждого воркера gunicorn свои данные.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+SHARED_CACHE = CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+# Версии данных (recipes/cache.py) в общем кэше хранятся бессрочно.
+# В локальном кэше версия, изменённая другим воркером, не видна, поэтому
+# она живёт CACHE_VERSION_TIMEOUT секунд: закэшированные ответы
+# устаревают в других воркерах не дольше, чем на это время.
+CACHE_VERSION_TIMEOUT = None if SHARED_CACHE else int(
+    os.getenv('CACHE_VERSION_TIMEOUT', 30)
+)
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', 10 * 60))
+
+# Кэш пользователей по токену: локальный LRU в каждом процессе и, если
+# AUTH_TOKEN_SHARED_CACHE_TTL > 0, общий кэш (только при SHARED_CACHE).
+# Окно отзыва: токен, отозванный выходом, сменой пароля или удалением
+# пользователя в одном воркере, в других принимается ещё до
+# AUTH_TOKEN_CACHE_TTL секунд. AUTH_TOKEN_CACHE_TTL=0 отключает LRU.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 30))
+
+AUTH_TOKEN_SHARED_CACHE_TTL = int(
+    os.getenv('AUTH_TOKEN_SHARED_CACHE_TTL', 0)
+)
+
+
+# Профилирование запросов (backend/profiling.py).
+PROFILING = os.getenv('PROFILING', 'False') == 'True'
+
+# Сколько одинаковых SQL-запросов за запрос считать признаком N+1.
+PROFILING_DUPLICATE_THRESHOLD = int(
+    os.getenv('PROFILING_DUPLICATE_THRESHOLD', 5)
+)
+
+PROFILING_REPORT_INTERVAL = int(os.getenv('PROFILING_REPORT_INTERVAL', 300))
+
+PROFILING_REPORT_SIZE = int(os.getenv('PROFILING_REPORT_SIZE', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+        'message': {
+            'format': '%(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+        'profiling': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'backend.profiling': {
+            'handlers': ['profiling'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -100,7 +239,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachingTokenAuthentication',
     ],
     'PAGE_SIZE': 6,
     'SEARCH_PARAM': 'name'
@@ -132,5 +271,73 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+
+RECIPE_IMAGE_MAX_PIXELS = int(os.getenv('RECIPE_IMAGE_MAX_PIXELS', 24_000_000))
+
+RECIPE_THUMBNAIL_SIZES = {
+    'small': 320,
+    'medium': 640,
+}
+
+
+# Сколько лучших результатов поиска отдаёт локальный индекс рецептов
+# (без PostgreSQL, см. recipes/search.py).
+RECIPE_SEARCH_FALLBACK_LIMIT = int(
+    os.getenv('RECIPE_SEARCH_FALLBACK_LIMIT', 500)
+)
+
+# Сколько подсказок отдаёт поиск ингредиентов по ?name=, если запрос
+# не задаёт limit (limit=0 - без ограничения).
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', 20))
+
+# Похожие рецепты (recipes/similarity.py): сколько соседей хранится
+# для рецепта и доля совместных добавлений в избранное и корзину
+# в сходстве (остальное - общие теги и ингредиенты).
+RECIPE_SIMILAR_SIZE = int(os.getenv('RECIPE_SIMILAR_SIZE', 20))
+
+RECIPE_SIMILARITY_COLLABORATIVE_WEIGHT = float(
+    os.getenv('RECIPE_SIMILARITY_COLLABORATIVE_WEIGHT', 0.7)
+)
+
+# Популярность рецептов (recipes/popularity.py): вклад добавления
+# уменьшается вдвое за RECIPE_POPULARITY_HALF_LIFE_DAYS. Период и веса
+# должны быть положительными; после их изменения выполняют
+# recompute_popularity.
+RECIPE_POPULARITY_EPOCH = datetime.fromisoformat(
+    os.getenv('RECIPE_POPULARITY_EPOCH', '2026-01-01T00:00:00+00:00')
+)
+
+RECIPE_POPULARITY_HALF_LIFE_DAYS = float(
+    os.getenv('RECIPE_POPULARITY_HALF_LIFE_DAYS', 7)
+)
+
+RECIPE_POPULARITY_WEIGHTS = {
+    'favorite': 1.0,
+    'shopping_cart': 0.5,
+}
+
+RECIPE_TRENDING_SIZE = int(os.getenv('RECIPE_TRENDING_SIZE', 20))
+
+# Лента подписок (recipes/timeline.py): рецепты авторов, у которых
+# подписчиков не меньше порога, не раскладываются по лентам при
+# публикации, а добираются при чтении.
+TIMELINE_CELEBRITY_FOLLOWERS = int(
+    os.getenv('TIMELINE_CELEBRITY_FOLLOWERS', 10_000)
+)
+
+TIMELINE_FANOUT_BATCH_SIZE = int(
+    os.getenv('TIMELINE_FANOUT_BATCH_SIZE', 1000)
+)
+
+# Сколько последних рецептов автора попадает в ленту при подписке.
+TIMELINE_BACKFILL_SIZE = int(os.getenv('TIMELINE_BACKFILL_SIZE', 50))
+
+TASK_QUEUE = os.getenv('TASK_QUEUE', 'recipes.tasks.ThreadPoolQueue')
+
+TASK_QUEUE_WORKERS = int(os.getenv('TASK_QUEUE_WORKERS', 2))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
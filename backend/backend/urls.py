@@ -3,12 +3,15 @@ from django.urls import path, include
 from django.contrib import admin
 from django.conf import settings
 
+from .views import MetricsView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('api/', include('recipes.urls')),
     path('api/auth/', include('djoser.urls.authtoken')),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
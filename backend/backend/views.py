@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework.views import APIView
+
+from users.permissions import IsAdmin
+
+from .metrics import get_registry
+
+
+class MetricsView(APIView):
+    """Метрики для Prometheus, только для администраторов."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+        )
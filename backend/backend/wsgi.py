@@ -5,3 +5,6 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Проверка постоянных соединений перед каждым запросом.
+from backend import db  # noqa: E402,F401
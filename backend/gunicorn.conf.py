@@ -0,0 +1,47 @@
+"""Настройки gunicorn.
+
+SERVER_MODE выбирает способ запуска приложения: wsgi (по умолчанию) -
+синхронные потоковые воркеры (gthread), asgi - воркеры uvicorn
+с backend.asgi. Django 3.2 и DRF 3.12 не поддерживают асинхронный ORM
+и асинхронные представления, поэтому в режиме asgi представления
+выполняются через sync_to_async, по одному запросу на воркер
+одновременно. Сравнение режимов - в README (команда loadtest).
+"""
+import multiprocessing
+import os
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+bind = os.getenv('GUNICORN_BIND', '0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1
+))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif SERVER_MODE == 'wsgi':
+    wsgi_app = 'backend.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+else:
+    raise ValueError(f'Неизвестный SERVER_MODE: {SERVER_MODE}')
+
+# Метрики Prometheus собираются со всех воркеров через общий каталог.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus')
+
+
+def on_starting(server):
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
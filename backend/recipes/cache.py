@@ -0,0 +1,97 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Recipe, Tag
+
+FEED = 'recipes:feed'
+
+
+def get_versions(names):
+    """Текущие версии пространств имён, меняются при каждом изменении."""
+
+    keys = [f'version:{name}' for name in names]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(
+                key, time.time_ns(), timeout=settings.CACHE_VERSION_TIMEOUT
+            )
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_versions(names):
+    for name in names:
+        key = f'version:{name}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(
+                key, time.time_ns(), timeout=settings.CACHE_VERSION_TIMEOUT
+            )
+
+
+def get_version(model):
+    return get_versions([model._meta.label_lower])[0]
+
+
+def bump_version(model):
+    bump_versions([model._meta.label_lower])
+
+
+def feed_namespaces(author=None, tag_ids=()):
+    namespaces = [FEED]
+
+    if author is None and not tag_ids:
+        namespaces.append(f'{FEED}:all')
+    if author is not None:
+        namespaces.append(f'{FEED}:author:{author}')
+    namespaces.extend(f'{FEED}:tag:{tag_id}' for tag_id in sorted(tag_ids))
+
+    return namespaces
+
+
+def feed_cache_key(namespaces, *params):
+    key = repr((get_versions(namespaces), params))
+
+    return f'{FEED}:page:{md5(key.encode()).hexdigest()}'
+
+
+def get_tag_ids(slugs):
+    """Id тэгов по слагам без обращения к базе, пока тэги не менялись."""
+
+    key = f'tag-ids:{get_version(Tag)}'
+    tag_ids = cache.get(key)
+
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(key, tag_ids, timeout=None)
+
+    return [tag_ids[slug] for slug in slugs if slug in tag_ids]
+
+
+def invalidate_feed(author_ids=(), tag_ids=(), everything=False):
+    """Сброс страниц ленты, которые могли измениться, после коммита."""
+
+    namespaces = [FEED] if everything else [f'{FEED}:all']
+    namespaces.extend(f'{FEED}:author:{author}' for author in author_ids)
+    namespaces.extend(f'{FEED}:tag:{tag_id}' for tag_id in tag_ids)
+
+    transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+def invalidate_recipes_feed(recipe_ids, tag_ids=()):
+    relations = Recipe.objects.filter(
+        pk__in=recipe_ids
+    ).values_list('author_id', 'tags')
+
+    invalidate_feed(
+        {author for author, _ in relations},
+        {tag for _, tag in relations if tag is not None} | set(tag_ids)
+    )
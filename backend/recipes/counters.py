@@ -0,0 +1,56 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import CustomUser as User, Subscribers
+
+from .models import (FavoriteRecipe, Recipe, RecipesIngredients,
+                     ShoppingCartRecipe)
+
+# Счётчик: модель и поле со значением, модель и поле связи подсчитываемых.
+COUNTERS = {
+    Recipe: {
+        'favorites_count': (FavoriteRecipe, 'recipe'),
+        'shopping_cart_count': (ShoppingCartRecipe, 'recipe'),
+        'ingredients_count': (RecipesIngredients, 'recipe'),
+    },
+    User: {
+        'recipes_count': (Recipe, 'author'),
+        'followers_count': (Subscribers, 'author'),
+    },
+}
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def change_counter(model, pk, counter, delta, **changes):
+    # Разошедшийся с данными счётчик не уходит ниже нуля (CHECK
+    # у PositiveIntegerField), его исправит recount_counters.
+    model.objects.filter(pk=pk).update(
+        **{counter: Greatest(F(counter) + delta, 0)}, **changes
+    )
+
+
+def recount_counter(model, pk, counter):
+    model.objects.filter(pk=pk).update(
+        **{counter: count_subquery(*COUNTERS[model][counter])}
+    )
+
+
+def recount(model, queryset=None):
+    """Пересчёт всех счётчиков модели одним UPDATE."""
+
+    if queryset is None:
+        queryset = model.objects.all()
+
+    return queryset.update(**{
+        counter: count_subquery(*source)
+        for counter, source in COUNTERS[model].items()
+    })
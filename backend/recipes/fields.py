@@ -0,0 +1,120 @@
+import binascii
+import re
+from tempfile import SpooledTemporaryFile
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image
+
+from rest_framework import serializers
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение в base64 с потоковым декодированием во временный файл.
+
+    Строка декодируется частями, размер проверяется по ходу декодирования,
+    а формат и размеры в пикселях — по заголовку, без чтения пикселей.
+    """
+
+    ALLOWED_FORMATS = {
+        'JPEG': 'jpg',
+        'PNG': 'png',
+        'GIF': 'gif',
+        'WEBP': 'webp',
+    }
+    CHUNK_SIZE = 64 * 1024
+    # a2b_base64 молча пропускает остальные символы (например, - и _
+    # из URL-safe base64), и файл сохранился бы повреждённым.
+    NOT_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+    default_error_messages = {
+        'invalid': 'Ожидается изображение в кодировке base64.',
+        'invalid_image': 'Загрузите корректное изображение.',
+        'invalid_format': 'Допустимые форматы: JPEG, PNG, GIF, WEBP.',
+        'max_bytes': 'Размер изображения больше {max_bytes} байт.',
+        'max_pixels': 'Изображение больше {max_pixels} пикселей.',
+    }
+
+    def __init__(self, max_bytes=None, max_pixels=None, **kwargs):
+        self.max_bytes = max_bytes or settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_pixels = max_pixels or settings.RECIPE_IMAGE_MAX_PIXELS
+        super().__init__(**kwargs)
+
+    def decode(self, data):
+        start = data.find(';base64,')
+        start = 0 if start == -1 else start + len(';base64,')
+
+        # Переносы строк base64 в стиле MIME не входят в размер.
+        length = len(data) - start - data.count('\n', start) - data.count(
+            '\r', start
+        )
+        if length * 3 // 4 > self.max_bytes + 2:
+            self.fail('max_bytes', max_bytes=self.max_bytes)
+
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        written = 0
+        remainder = ''
+        for position in range(start, len(data), self.CHUNK_SIZE):
+            # Без пробельных символов; неполная четвёрка переходит
+            # в следующую часть.
+            encoded = remainder + ''.join(
+                data[position:position + self.CHUNK_SIZE].split()
+            )
+            if self.NOT_BASE64.search(encoded):
+                file.close()
+                self.fail('invalid')
+
+            end = len(encoded) - len(encoded) % 4
+            encoded, remainder = encoded[:end], encoded[end:]
+            try:
+                chunk = binascii.a2b_base64(encoded)
+            except binascii.Error:
+                file.close()
+                self.fail('invalid')
+
+            written += len(chunk)
+            if written > self.max_bytes:
+                file.close()
+                self.fail('max_bytes', max_bytes=self.max_bytes)
+            file.write(chunk)
+
+        if remainder:
+            # Строка без выравнивания по четыре символа.
+            file.close()
+            self.fail('invalid')
+
+        file.seek(0)
+
+        return file
+
+    def check_image(self, file):
+        try:
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            file.close()
+            self.fail('invalid_image')
+
+        if image_format not in self.ALLOWED_FORMATS:
+            file.close()
+            self.fail('invalid_format')
+
+        if width * height > self.max_pixels:
+            file.close()
+            self.fail('max_pixels', max_pixels=self.max_pixels)
+
+        file.seek(0)
+
+        return self.ALLOWED_FORMATS[image_format]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            self.fail('invalid')
+
+        file = self.decode(data)
+        extension = self.check_image(file)
+
+        return File(file, name=f'{uuid4()}.{extension}')
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django_filters.rest_framework import filters, FilterSet
+
 from .models import Recipe, Tag
+from .search import search_recipes
 
 
 class RecipeFilter(FilterSet):
@@ -11,6 +14,11 @@ class RecipeFilter(FilterSet):
         method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter')
+    search = filters.CharFilter(method='search_filter')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'),),
+        method='ordering_filter'
+    )
 
     class Meta:
         model = Recipe
@@ -31,3 +39,14 @@ class RecipeFilter(FilterSet):
             return queryset.filter(shopping_recipes__user=user)
 
         return queryset
+
+    def search_filter(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+
+        return search_recipes(
+            queryset, value, settings.RECIPE_SEARCH_FALLBACK_LIMIT
+        )
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by('-popularity', '-pub_date')
@@ -0,0 +1,60 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .cache import invalidate_recipes_feed
+from .models import Recipe
+
+THUMBNAIL_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+
+def make_thumbnail(image, size, image_format):
+    thumbnail = image.copy()
+    thumbnail.thumbnail((size, size))
+    buffer = BytesIO()
+    # Метаданные (EXIF, ICC) не передаются в save и не попадают в файл.
+    thumbnail.save(buffer, image_format, quality=85)
+
+    return ContentFile(buffer.getvalue())
+
+
+def process_recipe_image(recipe_id):
+    """Создание миниатюр изображения рецепта и запись их путей."""
+
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+
+    source = recipe.image.name
+    stem = PurePosixPath(source).stem
+    variants = {}
+
+    with recipe.image.open('rb') as file, Image.open(file) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for size_name, size in settings.RECIPE_THUMBNAIL_SIZES.items():
+            variants[size_name] = {
+                extension: default_storage.save(
+                    f'recipes/thumbnails/{stem}_{size_name}.{extension}',
+                    make_thumbnail(image, size, image_format)
+                )
+                for extension, image_format in THUMBNAIL_FORMATS.items()
+            }
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=source).update(
+        image_variants=variants
+    )
+    stale = recipe.image_variants if updated else variants
+    for paths in stale.values():
+        for path in paths.values():
+            default_storage.delete(path)
+
+    if updated:
+        invalidate_recipes_feed([recipe_id])
@@ -0,0 +1,310 @@
+import json
+import platform
+import tracemalloc
+from datetime import datetime
+from statistics import mean, median
+from tempfile import TemporaryDirectory
+from time import sleep
+from timeit import default_timer
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.tasks import get_task_queue
+from users.models import CustomUser as User
+
+from .seed_bench import PREFIX
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21bK'
+    'AAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvDMA'
+    'AAAASUVORK5CYII='
+)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержки, числа SQL-запросов и памяти для адресов API на '
+        'данных seed_bench. Результат сохраняется в JSON и может быть '
+        'сравнён с предыдущим запуском.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default=f'{PREFIX}0')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--only', action='append',
+            help='Замерить только адреса, в названии которых есть строка.'
+        )
+        parser.add_argument('--output', help='Файл для результатов.')
+        parser.add_argument(
+            '--compare', help='Файл с результатами прошлого запуска.'
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["user"]} не найден, '
+                'сначала выполните seed_bench.'
+            )
+        self.state = {}
+        groups = self.get_groups(user)
+        if options['only']:
+            groups = [
+                group for group in groups
+                if any(
+                    pattern in name
+                    for name, *_ in group for pattern in options['only']
+                )
+            ]
+
+        # Изображения созданных рецептов и их миниатюры не остаются
+        # в MEDIA_ROOT.
+        with TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                results = self.measure(groups, options)
+                User.objects.filter(
+                    username__startswith=f'{PREFIX}api-'
+                ).delete()
+                while get_task_queue().qsize():
+                    sleep(0.1)
+
+        report = {
+            'meta': {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        self.print_report(results, options['compare'])
+
+    def measure(self, groups, options):
+        results = {}
+        for group in groups:
+            for _ in range(options['warmup']):
+                self.run_group(group)
+            samples = [self.run_group(group) for _ in range(options['repeat'])]
+            memory = self.run_group(group, trace_memory=True)
+            for name, *_ in group:
+                timings = [sample[name][0] for sample in samples]
+                queries = [sample[name][1] for sample in samples]
+                results[name] = {
+                    'status': samples[-1][name][2],
+                    'mean_ms': round(mean(timings), 2),
+                    'p50_ms': round(median(timings), 2),
+                    'p95_ms': round(percentile(timings, 0.95), 2),
+                    'max_ms': round(max(timings), 2),
+                    'queries': median(queries),
+                    'peak_memory_kb': round(memory[name][3] / 1024, 1),
+                }
+        return results
+
+    def get_groups(self, user):
+        """Сценарии: группа выполняется целиком на каждом повторе.
+
+        Запросы на запись собраны в пары (добавить/удалить), чтобы каждый
+        повтор начинался с одного и того же состояния базы.
+        """
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = APIClient()
+
+        recipe = Recipe.objects.exclude(author=user).exclude(
+            favorite_recipes__user=user
+        ).exclude(shopping_recipes__user=user).order_by('id').first()
+        author = User.objects.filter(
+            username__startswith=PREFIX
+        ).exclude(pk=user.pk).exclude(followed__user=user).first()
+        other = User.objects.filter(
+            username__startswith=PREFIX
+        ).exclude(pk__in=(user.pk, author.pk)).first()
+        tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+        new_recipe = {
+            'name': f'{PREFIX}api',
+            'text': 'bench',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'ingredients': [
+                {'id': pk, 'amount': 10}
+                for pk in Ingredient.objects.values_list('id', flat=True)[:5]
+            ],
+        }
+        tag_query = '&'.join(f'tags={slug}' for slug in tags)
+
+        def register(number):
+            return {
+                'email': f'{PREFIX}api-{number}@bench.ru',
+                'username': f'{PREFIX}api-{number}',
+                'first_name': 'Bench',
+                'last_name': 'Api',
+                'password': 'bench-api-password',
+            }
+
+        return [
+            [('GET recipes (anonymous, cached)', anonymous, 'get',
+              '/api/recipes/', None)],
+            [('GET recipes?tags (anonymous, cached)', anonymous, 'get',
+              f'/api/recipes/?{tag_query}', None)],
+            [('GET recipes?pagination=cursor (anonymous, cached)', anonymous,
+              'get', '/api/recipes/?pagination=cursor', None)],
+            [('GET recipes', client, 'get', '/api/recipes/', None)],
+            [('GET recipes?ordering=popular', client, 'get',
+              '/api/recipes/?ordering=popular', None)],
+            [('GET recipes/trending', anonymous, 'get',
+              '/api/recipes/trending/', None)],
+            [('GET recipes?is_favorited', client, 'get',
+              '/api/recipes/?is_favorited=1', None)],
+            [('GET recipes?is_in_shopping_cart', client, 'get',
+              '/api/recipes/?is_in_shopping_cart=1', None)],
+            [('GET recipes?author', client, 'get',
+              f'/api/recipes/?author={author.pk}', None)],
+            [('GET recipes/{id}', client, 'get',
+              f'/api/recipes/{recipe.pk}/', None)],
+            [('GET recipes/feed', client, 'get', '/api/recipes/feed/', None)],
+            [('GET recipes/{id}/similar', client, 'get',
+              f'/api/recipes/{recipe.pk}/similar/', None)],
+            [('GET recipes/recommended', client, 'get',
+              '/api/recipes/recommended/', None)],
+            [('GET recipes/download_shopping_cart', client, 'get',
+              '/api/recipes/download_shopping_cart/', None)],
+            [
+                ('POST recipes', client, 'post', '/api/recipes/', new_recipe),
+                ('PATCH recipes/{id}', client, 'patch',
+                 '/api/recipes/{created}/', {
+                     key: value for key, value in new_recipe.items()
+                     if key != 'image'
+                 }),
+                ('DELETE recipes/{id}', client, 'delete',
+                 '/api/recipes/{created}/', None),
+            ],
+            [
+                ('POST recipes/{id}/favorite', client, 'post',
+                 f'/api/recipes/{recipe.pk}/favorite/', None),
+                ('DELETE recipes/{id}/favorite', client, 'delete',
+                 f'/api/recipes/{recipe.pk}/favorite/', None),
+            ],
+            [
+                ('POST recipes/{id}/shopping_cart', client, 'post',
+                 f'/api/recipes/{recipe.pk}/shopping_cart/', None),
+                ('DELETE recipes/{id}/shopping_cart', client, 'delete',
+                 f'/api/recipes/{recipe.pk}/shopping_cart/', None),
+            ],
+            [('GET tags', anonymous, 'get', '/api/tags/', None)],
+            [('GET ingredients?name', anonymous, 'get',
+              '/api/ingredients/?name=сах', None)],
+            [('GET users', client, 'get', '/api/users/', None)],
+            [('GET users/me', client, 'get', '/api/users/me/', None)],
+            [('GET users/{id}', client, 'get',
+              f'/api/users/{author.pk}/', None)],
+            [('GET users/subscriptions', client, 'get',
+              '/api/users/subscriptions/?recipes_limit=3', None)],
+            [
+                ('POST users/{id}/subscribe', client, 'post',
+                 f'/api/users/{author.pk}/subscribe/', None),
+                ('DELETE users/{id}/subscribe', client, 'delete',
+                 f'/api/users/{author.pk}/subscribe/', None),
+            ],
+            [
+                ('POST users/set_password', client, 'post',
+                 '/api/users/set_password/', {
+                     'current_password': PREFIX,
+                     'new_password': f'{PREFIX}new',
+                 }),
+                ('POST users/set_password (back)', client, 'post',
+                 '/api/users/set_password/', {
+                     'current_password': f'{PREFIX}new',
+                     'new_password': PREFIX,
+                 }),
+            ],
+            [('POST users', anonymous, 'post', '/api/users/', register)],
+            [
+                ('POST auth/token/login', anonymous, 'post',
+                 '/api/auth/token/login/', {
+                     'email': other.email, 'password': PREFIX,
+                 }),
+                ('POST auth/token/logout', anonymous, 'post',
+                 '/api/auth/token/logout/', None),
+            ],
+        ]
+
+    def run_group(self, group, trace_memory=False):
+        measurements = {}
+        for name, client, method, path, data in group:
+            if callable(data):
+                self.state['number'] = self.state.get('number', 0) + 1
+                data = data(self.state['number'])
+            if name == 'POST auth/token/logout':
+                client.credentials(
+                    HTTP_AUTHORIZATION=f'Token {self.state["token"]}'
+                )
+            if trace_memory:
+                tracemalloc.start()
+            with CaptureQueriesContext(connection) as queries:
+                started = default_timer()
+                response = getattr(client, method)(
+                    path.format(**self.state), data, format='json'
+                )
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (default_timer() - started) * 1000
+            peak = 0
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            if name == 'POST recipes':
+                self.state['created'] = response.data.get('id')
+            elif name == 'POST auth/token/login':
+                self.state['token'] = response.data.get('auth_token')
+            elif name == 'POST auth/token/logout':
+                client.credentials()
+            measurements[name] = (
+                elapsed, len(queries), response.status_code, peak
+            )
+        return measurements
+
+    def print_report(self, results, compare):
+        previous = {}
+        if compare:
+            with open(compare, encoding='utf-8') as file:
+                previous = json.load(file)['results']
+        for name, result in results.items():
+            line = (
+                f'{name:<50} {result["status"]:>3} '
+                f'p50 {result["p50_ms"]:>8.2f} мс  '
+                f'p95 {result["p95_ms"]:>8.2f} мс  '
+                f'запросов {result["queries"]:>4}  '
+                f'память {result["peak_memory_kb"]:>8.1f} КБ'
+            )
+            before = previous.get(name)
+            if before:
+                change = (
+                    (result['p50_ms'] - before['p50_ms'])
+                    / before['p50_ms'] * 100 if before['p50_ms'] else 0
+                )
+                line += (
+                    f'  | p50 {change:+.1f}%, запросов '
+                    f'{result["queries"] - before["queries"]:+}'
+                )
+            self.stdout.write(line)
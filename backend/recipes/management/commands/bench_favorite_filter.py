@@ -0,0 +1,114 @@
+import random
+from statistics import median
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCartRecipe
+from users.models import CustomUser as User
+
+# Отдельно от seed_bench (bench-): его данные могут уже быть в базе.
+PREFIX = 'bench-filter-'
+
+
+class RollbackError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер фильтров is_favorited/is_in_shopping_cart на больших '
+        'объёмах. Данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--favorites', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10_000)
+        parser.add_argument('--samples', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                self.measure(options)
+                raise RollbackError
+        except RollbackError:
+            pass
+
+    def bulk_create(self, model, objects, batch_size):
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+    def seed(self, options):
+        started = default_timer()
+        batch_size = options['batch_size']
+        self.bulk_create(User, (
+            User(
+                username=f'{PREFIX}{number}', email=f'{PREFIX}{number}@bench'
+            )
+            for number in range(options['users'])
+        ), batch_size)
+        self.users = list(User.objects.filter(
+            username__startswith=PREFIX
+        ).values_list('id', flat=True))
+        author = self.users[0]
+        self.bulk_create(Recipe, (
+            Recipe(
+                name=f'{PREFIX}{number}', text='bench', author_id=author,
+                image='recipes/bench.png', cooking_time=1
+            )
+            for number in range(options['recipes'])
+        ), batch_size)
+        recipes = list(Recipe.objects.filter(
+            author_id=author
+        ).values_list('id', flat=True))
+
+        per_user = min(
+            options['favorites'] // len(self.users), len(recipes)
+        )
+        random.seed(0)
+        for model in (FavoriteRecipe, ShoppingCartRecipe):
+            self.bulk_create(model, (
+                model(user_id=user, recipe_id=recipe)
+                for user in self.users
+                for recipe in random.sample(recipes, per_user)
+            ), batch_size)
+
+        self.stdout.write(
+            f'Пользователей: {len(self.users)}, рецептов: {len(recipes)}, '
+            f'избранного и корзин по {per_user * len(self.users)}, '
+            f'подготовка {default_timer() - started:.1f} с'
+        )
+
+    def timed(self, name, build, samples):
+        timings = []
+        for user in random.sample(self.users, samples):
+            started = default_timer()
+            list(build(user))
+            timings.append((default_timer() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(
+            f'{name}: медиана {median(timings):.2f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95)]:.2f} мс'
+        )
+        self.stdout.write(build(self.users[0]).explain())
+
+    def measure(self, options):
+        samples = min(options['samples'], len(self.users))
+
+        self.timed('is_favorited', lambda user: Recipe.objects.filter(
+            favorite_recipes__user=user
+        )[:6], samples)
+        self.timed('is_in_shopping_cart', lambda user: Recipe.objects.filter(
+            shopping_recipes__user=user
+        )[:6], samples)
+        self.timed('флаги в ленте', lambda user: Recipe.objects.annotate(
+            is_favorited=Exists(FavoriteRecipe.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+            is_in_shopping_cart=Exists(ShoppingCartRecipe.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+        )[:6], samples)
@@ -0,0 +1,67 @@
+import base64
+import os
+import tracemalloc
+from io import BytesIO
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from recipes.fields import Base64ImageField
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение пикового потребления памяти при разборе base64 '
+        'изображения полем recipes и полем drf-extra-fields.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=3000,
+            help='Сторона тестового изображения в пикселях.'
+        )
+
+    def make_payload(self, size):
+        image = Image.frombytes(
+            'RGB', (size, size), os.urandom(size * size * 3)
+        )
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=95)
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+
+        return f'data:image/jpeg;base64,{encoded}', buffer.tell()
+
+    def measure(self, name, field, payload):
+        tracemalloc.start()
+        started = default_timer()
+        value = field.to_internal_value(payload)
+        elapsed = default_timer() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        value.close()
+
+        self.stdout.write(
+            f'{name}: пик памяти {peak / 2 ** 20:.1f} МиБ, '
+            f'время {elapsed * 1000:.0f} мс'
+        )
+
+    def handle(self, *args, **options):
+        payload, size = self.make_payload(options['size'])
+        self.stdout.write(
+            f'Изображение {size / 2 ** 20:.1f} МиБ, '
+            f'base64 {len(payload) / 2 ** 20:.1f} МиБ'
+        )
+
+        self.measure('recipes.fields.Base64ImageField', Base64ImageField(
+            max_bytes=size * 2, max_pixels=options['size'] ** 2
+        ), payload)
+
+        try:
+            from drf_extra_fields.fields import Base64ImageField as Previous
+        except ImportError:
+            self.stdout.write('drf-extra-fields не установлен, сравнения нет.')
+        else:
+            self.measure('drf_extra_fields Base64ImageField', Previous(
+                max_length=None
+            ), payload)
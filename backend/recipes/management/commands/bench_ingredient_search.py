@@ -0,0 +1,77 @@
+import csv
+import random
+from statistics import mean, median
+from timeit import default_timer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.models import Ingredient
+from recipes.search import IngredientIndex
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости поиска по индексу ингредиентов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+            help='CSV-файл с ингредиентами (name, measurement_unit).'
+        )
+        parser.add_argument(
+            '--scale', type=int, default=10,
+            help='Во сколько раз увеличить каталог.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=settings.INGREDIENT_SEARCH_LIMIT,
+            help=(
+                'Максимум подсказок в ответе (0 - без ограничения), '
+                'по умолчанию как в API.'
+            )
+        )
+        parser.add_argument('--queries', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as file:
+            rows = list(csv.reader(file))
+
+        ingredients = [
+            Ingredient(
+                id=copy * len(rows) + number,
+                name=name if copy == 0 else f'{name} {copy}',
+                measurement_unit=measurement_unit
+            )
+            for copy in range(options['scale'])
+            for number, (name, measurement_unit) in enumerate(rows)
+        ]
+
+        started = default_timer()
+        index = IngredientIndex(ingredients)
+        build_time = default_timer() - started
+
+        random.seed(0)
+        queries = []
+        for _ in range(options['queries']):
+            name = random.choice(rows)[0]
+            start = random.randrange(len(name))
+            if random.random() < 0.5:
+                start = 0
+            queries.append(name[start:start + random.randint(1, 6)])
+
+        timings = []
+        for query in queries:
+            started = default_timer()
+            index.search(query, options['limit'])
+            timings.append((default_timer() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(
+            f'Ингредиентов: {len(index)}, '
+            f'построение индекса: {build_time * 1000:.1f} мс\n'
+            f'Запросов: {len(timings)}, лимит: {options["limit"]}\n'
+            f'среднее: {mean(timings):.4f} мс, '
+            f'медиана: {median(timings):.4f} мс, '
+            f'p99: {timings[int(len(timings) * 0.99)]:.4f} мс, '
+            f'максимум: {timings[-1]:.4f} мс'
+        )
@@ -0,0 +1,33 @@
+from timeit import default_timer
+
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import build_neighbors
+
+
+class Command(BaseCommand):
+    help = (
+        'Расчёт похожих рецептов. По умолчанию пересчитываются только '
+        'рецепты, изменившиеся после прошлого запуска, поэтому команду '
+        'можно запускать по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать соседей всех рецептов.'
+        )
+        parser.add_argument(
+            '--size', type=int, help='Число соседей рецепта.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = default_timer()
+        updated = build_neighbors(
+            options['full'], options['size'], options['batch_size']
+        )
+        self.stdout.write(
+            f'Пересчитано рецептов: {updated} '
+            f'за {default_timer() - started:.1f} с'
+        )
@@ -0,0 +1,119 @@
+import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+from timeit import default_timer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.cache import bump_version
+from recipes.models import Ingredient
+
+
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not any(field.strip() for field in row):
+            continue
+        if len(row) < 2:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидается название '
+                'и единица измерения.'
+            )
+        yield row[0], row[1]
+
+
+def read_json(file, chunk_size=64 * 1024):
+    """Потоковый разбор JSON-массива без загрузки файла целиком."""
+
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив объектов.')
+    position = 1
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Некорректный JSON-файл.')
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Загрузка ингредиентов из CSV или JSON файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+            help='Путь к файлу ingredients.csv или ingredients.json.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        reader = READERS.get(path.suffix.lower())
+
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json.')
+
+        started = default_timer()
+        total = Ingredient.objects.count()
+        rows = 0
+
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            items = reader(file)
+            while True:
+                batch = dict.fromkeys(
+                    (name.strip(), measurement_unit.strip())
+                    for name, measurement_unit in islice(
+                        items, options['batch_size']
+                    )
+                )
+                if not batch:
+                    break
+
+                rows += len(batch)
+                Ingredient.objects.bulk_create(
+                    (
+                        Ingredient(
+                            name=name, measurement_unit=measurement_unit
+                        )
+                        for name, measurement_unit in batch
+                    ),
+                    batch_size=options['batch_size'],
+                    ignore_conflicts=True
+                )
+
+        bump_version(Ingredient)
+        elapsed = default_timer() - started
+        created = Ingredient.objects.count() - total
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {rows}, добавлено: {created}, '
+            f'за {elapsed:.2f} с ({rows / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
@@ -0,0 +1,86 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean
+from timeit import default_timer
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2',
+    '/api/tags/',
+    '/api/ingredients/?name=са',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест запущенного сервера: RPS и перцентили задержки '
+        'для сравнения режимов SERVER_MODE=wsgi и SERVER_MODE=asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Адрес для запросов, можно указать несколько раз.'
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--token', help='Токен для авторизованных запросов.'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=options['concurrency']
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def fetch(number):
+            url = options['url'] + paths[number % len(paths)]
+            started = default_timer()
+            try:
+                response = session.get(url, headers=headers, timeout=30)
+            except requests.RequestException:
+                return None
+            return default_timer() - started, response.status_code
+
+        started = default_timer()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(fetch, range(options['requests'])))
+        elapsed = default_timer() - started
+
+        timings = sorted(
+            result[0] * 1000 for result in results if result is not None
+        )
+        if not timings:
+            raise CommandError(f'Сервер {options["url"]} недоступен.')
+        errors = sum(
+            1 for result in results if result is None or result[1] >= 500
+        )
+
+        def percentile(share):
+            return round(timings[min(
+                int(len(timings) * share), len(timings) - 1
+            )], 2)
+
+        self.stdout.write(json.dumps({
+            'url': options['url'],
+            'requests': len(results),
+            'concurrency': options['concurrency'],
+            'errors': errors,
+            'rps': round(len(results) / elapsed, 1),
+            'mean_ms': round(mean(timings), 2),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(timings[-1], 2),
+        }, indent=2))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+from recipes.tasks import SyncQueue, get_task_queue
+
+
+class Command(BaseCommand):
+    help = 'Создание миниатюр для рецептов, у которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать миниатюры для всех рецептов.'
+        )
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Передать задачи в настроенную очередь TASK_QUEUE.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+
+        queue = get_task_queue() if options['background'] else SyncQueue()
+        total = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator():
+            queue.submit(process_recipe_image, recipe_id)
+            total += 1
+
+        self.stdout.write(f'Рецептов в обработке: {total}')
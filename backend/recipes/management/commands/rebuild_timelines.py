@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.models import TimelineEntry
+from recipes.timeline import (add_entries, get_follower_batches,
+                              get_recent_recipes)
+from users.models import CustomUser as User
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение лент подписок последними рецептами авторов, например '
+        'после загрузки данных в обход сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Предварительно очистить все ленты.'
+        )
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            TimelineEntry.objects.all().delete()
+
+        authors = list(User.objects.filter(
+            recipes_count__gt=0,
+            followers_count__gt=0,
+            followers_count__lt=settings.TIMELINE_CELEBRITY_FOLLOWERS
+        ).values_list('id', flat=True))
+
+        for author_id in authors:
+            recipes = get_recent_recipes(author_id)
+            for user_ids in get_follower_batches(author_id):
+                add_entries(user_ids, author_id, recipes)
+
+        self.stdout.write(
+            f'Авторов: {len(authors)}, записей в лентах: '
+            f'{TimelineEntry.objects.count()}'
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from recipes.models import Recipe
+from recipes.popularity import recompute_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт популярности рецептов по датам добавлений в избранное '
+        'и списки покупок. Запускается по расписанию и после изменения '
+        'RECIPE_POPULARITY_* в настройках.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = Recipe.objects.aggregate(last_pk=Max('pk'))['last_pk']
+        updated = 0
+
+        for start in range(0, (last_pk or 0) + 1, batch_size):
+            updated += recompute_popularity(start, start + batch_size)
+
+        self.stdout.write(f'Рецептов: пересчитано {updated}')
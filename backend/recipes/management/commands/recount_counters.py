@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.counters import COUNTERS, recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, корзин, рецептов и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for model in COUNTERS:
+            last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk']
+            updated = 0
+
+            for start in range(0, (last_pk or 0) + 1, batch_size):
+                with transaction.atomic():
+                    updated += recount(model, model.objects.filter(
+                        pk__gte=start, pk__lt=start + batch_size
+                    ))
+
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: пересчитано {updated}'
+            )
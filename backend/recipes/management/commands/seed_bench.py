@@ -0,0 +1,150 @@
+import random
+from timeit import default_timer
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cache import bump_version, invalidate_feed
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe,
+                            RecipesIngredients, RecipesTags,
+                            ShoppingCartRecipe, Tag)
+from users.models import CustomUser as User, Subscribers
+
+PREFIX = 'bench-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнение базы данными для бенчмарков (bench_api). Объёмы '
+        'задаются параметрами, данные воспроизводимы при одном --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+            help='CSV-файл с ингредиентами для load_ingredients.'
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10_000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Удалить ранее созданные данные бенчмарка.'
+        )
+
+    def handle(self, *args, **options):
+        started = default_timer()
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['flush']:
+            User.objects.filter(username__startswith=PREFIX).delete()
+            Tag.objects.filter(slug__startswith=PREFIX).delete()
+
+        call_command('load_ingredients', options['ingredients'])
+        with transaction.atomic():
+            self.seed(options)
+        call_command('recount_counters', batch_size=self.batch_size)
+        call_command('recompute_popularity', batch_size=self.batch_size)
+        call_command('rebuild_timelines')
+        call_command('build_recipe_similarity', full=True)
+        bump_version(Tag)
+        invalidate_feed(everything=True)
+
+        self.stdout.write(
+            f'Готово за {default_timer() - started:.1f} с: '
+            f'пользователей {options["users"]}, '
+            f'рецептов {options["recipes"]}'
+        )
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+
+    def sample(self, population, size):
+        return self.random.sample(population, min(size, len(population)))
+
+    def seed(self, options):
+        self.bulk_create(Tag, (
+            Tag(
+                name=f'{PREFIX}{number}', slug=f'{PREFIX}{number}',
+                color=f'#{number:06x}'
+            )
+            for number in range(options['tags'])
+        ))
+        tags = list(Tag.objects.filter(
+            slug__startswith=PREFIX
+        ).values_list('id', flat=True))
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+
+        password = make_password(PREFIX)
+        self.bulk_create(User, (
+            User(
+                username=f'{PREFIX}{number}',
+                email=f'{PREFIX}{number}@bench.ru',
+                first_name='Bench', last_name=str(number),
+                password=password
+            )
+            for number in range(options['users'])
+        ))
+        users = list(User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+        self.bulk_create(Recipe, (
+            Recipe(
+                name=f'{PREFIX}{number}', text='bench',
+                author_id=self.random.choice(users),
+                image='recipes/bench.png',
+                cooking_time=self.random.randint(1, 120)
+            )
+            for number in range(options['recipes'])
+        ))
+        recipes = list(Recipe.objects.filter(
+            author__username__startswith=PREFIX
+        ).values_list('id', flat=True))
+
+        self.bulk_create(RecipesTags, (
+            RecipesTags(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in self.sample(tags, options['tags_per_recipe'])
+        ))
+        self.bulk_create(RecipesIngredients, (
+            RecipesIngredients(
+                recipe_id=recipe, ingredient_id=ingredient,
+                amount=self.random.randint(1, 500)
+            )
+            for recipe in recipes
+            for ingredient in self.sample(
+                ingredients, options['ingredients_per_recipe']
+            )
+        ))
+        for model, per_user in (
+            (FavoriteRecipe, options['favorites_per_user']),
+            (ShoppingCartRecipe, options['cart_per_user']),
+        ):
+            self.bulk_create(model, (
+                model(user_id=user, recipe_id=recipe)
+                for user in users
+                for recipe in self.sample(recipes, per_user)
+            ))
+        self.bulk_create(Subscribers, (
+            Subscribers(user_id=user, author_id=author)
+            for user in users
+            for author in self.sample(
+                users, options['subscriptions_per_user']
+            )
+            if author != user
+        ))
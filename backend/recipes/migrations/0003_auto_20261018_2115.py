@@ -0,0 +1,75 @@
+# Generated by Django 3.2 on 2026-10-18 18:15
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipesIngredients = apps.get_model('recipes', 'RecipesIngredients')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(kept=Min('id'), total=Count('id')).filter(total__gt=1)
+
+    for duplicate in duplicates:
+        extra = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(pk=duplicate['kept'])
+        for row in RecipesIngredients.objects.filter(ingredient__in=extra):
+            # В рецепте уже может быть оставляемый ингредиент.
+            kept_row = RecipesIngredients.objects.filter(
+                recipe_id=row.recipe_id, ingredient_id=duplicate['kept']
+            ).first()
+            if kept_row is None:
+                row.ingredient_id = duplicate['kept']
+                row.save(update_fields=['ingredient'])
+            else:
+                kept_row.amount = min(kept_row.amount + row.amount, 32767)
+                kept_row.save(update_fields=['amount'])
+                row.delete()
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0002_auto_20230605_1852'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ('id',)},
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='author',
+            field=models.ForeignKey(help_text='Автор рецепта', on_delete=django.db.models.deletion.CASCADE, related_name='author', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcartrecipe',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_recipes', to='recipes.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='color',
+            field=models.CharField(max_length=7, unique=True, validators=[django.core.validators.RegexValidator('^#([a-fA-F0-9]{6})', message='Ожидается HEX-код')], verbose_name='Цвет тэга'),
+        ),
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
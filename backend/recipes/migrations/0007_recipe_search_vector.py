@@ -0,0 +1,49 @@
+# Generated by Django 3.2 on 2026-10-18 18:34
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX = 'recipes_recipe_search_gin'
+
+
+def create_search_index(apps, schema_editor):
+    """GIN-индекс и начальное заполнение - только на PostgreSQL."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        f'CREATE INDEX {INDEX} ON recipes_recipe USING gin (search_vector)'
+    )
+    schema_editor.execute("""
+        UPDATE recipes_recipe AS recipe SET search_vector =
+            setweight(to_tsvector('russian', recipe.name), 'A')
+            || setweight(to_tsvector('russian', recipe.text), 'B')
+            || setweight(to_tsvector('russian', coalesce((
+                SELECT string_agg(ingredient.name, ' ')
+                FROM recipes_recipesingredients AS link
+                JOIN recipes_ingredient AS ingredient
+                    ON ingredient.id = link.ingredient_id
+                WHERE link.recipe_id = recipe.id
+            ), '')), 'C')
+    """)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
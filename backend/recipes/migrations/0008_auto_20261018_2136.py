@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_ingredients_count(apps, schema_editor):
+    apps.get_model('recipes', 'Recipe').objects.update(
+        ingredients_count=Coalesce(Subquery(
+            apps.get_model('recipes', 'RecipesIngredients').objects.filter(
+                recipe=OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число ингредиентов'),
+        ),
+        migrations.AlterField(
+            model_name='recipesingredients',
+            name='ingredient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredient', to='recipes.ingredient'),
+        ),
+        migrations.AddIndex(
+            model_name='recipesingredients',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipe_by_ingredient'),
+        ),
+        migrations.RunPython(
+            fill_ingredients_count, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 19:15
+
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+
+def fill_popularity(apps, schema_editor):
+    # popularity = ln(1 + S), см. recipes/popularity.py.
+    Recipe = apps.get_model('recipes', 'Recipe')
+    sources = {
+        'FavoriteRecipe': 'favorite',
+        'ShoppingCartRecipe': 'shopping_cart',
+    }
+    scores = defaultdict(float)
+
+    for model_name, source in sources.items():
+        weight = math.log(settings.RECIPE_POPULARITY_WEIGHTS[source])
+        added = apps.get_model('recipes', model_name).objects.values_list(
+            'recipe_id', 'created_at'
+        )
+        for recipe_id, created_at in added.iterator():
+            days = (
+                created_at - settings.RECIPE_POPULARITY_EPOCH
+            ).total_seconds() / (24 * 60 * 60)
+            score = weight + days / (
+                settings.RECIPE_POPULARITY_HALF_LIFE_DAYS
+            ) * math.log(2)
+            high = max(scores[recipe_id], score)
+            low = min(scores[recipe_id], score)
+            scores[recipe_id] = high + math.log1p(math.exp(low - high))
+
+    Recipe.objects.update(popularity=0)
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, popularity=score)
+            for recipe_id, score in scores.items()
+        ],
+        ['popularity'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_auto_20261018_2146'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
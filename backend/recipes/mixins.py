@@ -0,0 +1,69 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.metrics import CACHE_REQUESTS
+
+from .cache import get_version
+
+
+class VersionedCacheMixin:
+    """Кэширование list/retrieve с ключом по версии данных модели.
+
+    Версия меняется сигналами при сохранении и удалении объектов,
+    поэтому устаревшие ответы просто перестают запрашиваться. С локальным
+    кэшем другие воркеры получают новую версию не позже чем через
+    CACHE_VERSION_TIMEOUT (см. recipes/cache.py).
+    """
+
+    cache_timeout = settings.CATALOG_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_path(self, request):
+        return request.get_full_path()
+
+    def get_etag(self, request):
+        model = self.queryset.model
+        key = (
+            f'{model._meta.label_lower}:{get_version(model)}:'
+            f'{self.get_cache_path(request)}'
+        )
+
+        return f'"{md5(key.encode()).hexdigest()}"'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        headers = {'ETag': etag}
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            CACHE_REQUESTS.labels('catalog', 'not_modified').inc()
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+
+        key = f'response:{etag}'
+        data = cache.get(key)
+
+        CACHE_REQUESTS.labels(
+            'catalog', 'miss' if data is None else 'hit'
+        ).inc()
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            data = response.data
+            cache.set(key, data, self.cache_timeout)
+
+        return Response(data, headers=headers)
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 
@@ -12,6 +13,12 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -63,6 +70,9 @@ class Recipe(models.Model):
         Tag, through='RecipesTags',
     )
     image = models.ImageField('Изображение', upload_to='recipes/')
+    image_variants = models.JSONField(
+        'Миниатюры изображения', default=dict, blank=True, editable=False
+    )
     cooking_time = models.PositiveSmallIntegerField(
         'Время приготовления в минутах',
         validators=[
@@ -74,19 +84,48 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True, db_index=True
     )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0, editable=False
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0, editable=False
+    )
+    ingredients_count = models.PositiveIntegerField(
+        'Число ингредиентов', default=0, editable=False
+    )
+    # Затухающая со временем оценка добавлений в избранное и корзину
+    # (recipes/popularity.py).
+    popularity = models.FloatField(
+        'Популярность', default=0, db_index=True, editable=False
+    )
+    # Заполняется только на PostgreSQL (recipes/search.py), GIN-индекс
+    # создаётся миграцией 0007.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Избранное, корзины, теги или ингредиенты изменились после расчёта
+    # похожих рецептов (recipes/similarity.py).
+    neighbors_stale = models.BooleanField(default=True, editable=False)
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(neighbors_stale=True),
+                name='recipe_neighbors_stale'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
 class RecipesIngredients(models.Model):
+    # Индекс (ingredient, recipe) ниже заменяет индекс внешнего ключа.
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
-        related_name='recipe_ingredient'
+        related_name='recipe_ingredient',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -106,6 +145,13 @@ class RecipesIngredients(models.Model):
                 name='unique_recipe_ingredient'
             )
         ]
+        # Обратный индекс: рецепты по ингредиенту (поиск «что приготовить»).
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='recipe_by_ingredient'
+            )
+        ]
 
 
 class RecipesTags(models.Model):
@@ -127,7 +173,8 @@ class FavoriteRecipe(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='favorite_recipes'
+        related_name='favorite_recipes',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -136,11 +183,12 @@ class FavoriteRecipe(models.Model):
         null=False,
         related_name='favorite_recipes'
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=['recipe', 'user'],
+                fields=['user', 'recipe'],
                 name='unique_favorite'
             )
         ]
@@ -150,19 +198,84 @@ class ShoppingCartRecipe(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='shopping_cart'
+        related_name='shopping_cart',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='shopping_recipes'
     )
+    created_at = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Shopping cart'
         constraints = [
             models.UniqueConstraint(
-                fields=['recipe', 'user'],
+                fields=['user', 'recipe'],
                 name='unique_recipe_cart'
             )
         ]
+
+
+class TimelineEntry(models.Model):
+    """Рецепт в ленте подписок пользователя (см. recipes/timeline.py)."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        db_index=False
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Копия Recipe.pub_date: лента читается без соединения с рецептами.
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='timeline_by_date'
+            )
+        ]
+
+
+class RecipeSimilarity(models.Model):
+    """Похожий рецепт из top-K соседей (см. recipes/similarity.py)."""
+
+    # Индекс (recipe, -score) ниже заменяет индекс внешнего ключа.
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbors',
+        db_index=False
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbor_of'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similarity_by_score'
+            )
+        ]
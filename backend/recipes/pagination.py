@@ -0,0 +1,123 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_filter(queryset, position, pk_field='id'):
+    """Элементы после позиции (pub_date, pk) в порядке убывания."""
+
+    queryset = queryset.order_by('-pub_date', f'-{pk_field}')
+
+    if position is None:
+        return queryset
+
+    pub_date, pk = position
+
+    return queryset.filter(
+        Q(pub_date__lt=pub_date)
+        | Q(pub_date=pub_date, **{f'{pk_field}__lt': pk})
+    )
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по (pub_date, id) без OFFSET и COUNT(*)."""
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def encode_cursor(self, item):
+        position = f'{item.pub_date.isoformat()}|{item.pk}'
+
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            pub_date, pk = urlsafe_b64decode(
+                cursor.encode()
+            ).decode().split('|')
+            position = parse_datetime(pub_date), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def filter_queryset(self, queryset, position):
+        return keyset_filter(queryset, position)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.filter_queryset(queryset, self.decode_cursor(request))
+
+        return self.paginate_items(queryset[:self.page_size + 1], request)
+
+    def paginate_items(self, items, request):
+        """Страница из уже отобранных page_size + 1 элементов."""
+
+        self.request = request
+        page = list(items)
+
+        self.next_item = (
+            page[self.page_size - 1] if len(page) > self.page_size else None
+        )
+
+        return page[:self.page_size]
+
+    def get_next_link(self):
+        if self.next_item is None:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_item)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class RecipePagination(PageNumberPagination):
+    """Постраничная пагинация, с ?pagination=cursor — курсорная.
+
+    Курсор построен на порядке по дате, поэтому с ?ordering пагинация
+    всегда постраничная.
+    """
+
+    mode_query_param = 'pagination'
+    ordering_query_param = 'ordering'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+
+        if self.ordering_query_param not in request.query_params and (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        ):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
@@ -5,7 +5,9 @@ class RecipePermissions(BasePermission):
 
     def has_permission(self, request, view):
 
-        if view.action in ['retrieve', 'list']:
+        if view.action in [
+            'retrieve', 'list', 'what_to_cook', 'similar', 'trending'
+        ]:
             return True
 
         elif view.action in ['create', 'destroy', 'update']:
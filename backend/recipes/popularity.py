@@ -0,0 +1,134 @@
+"""Популярность рецептов.
+
+Оценка рецепта S - сумма весов добавлений в избранное и список покупок,
+умноженных на 2 ** ((время добавления - эпоха) / период полураспада).
+Эпоха фиксирована, поэтому старые добавления не пересчитываются: их
+доля падает относительно новых сама, и порядок по S совпадает с порядком
+по затухающей оценке на текущий момент.
+
+S растёт экспоненциально и через несколько сотен периодов полураспада
+не помещается во float, поэтому Recipe.popularity хранит ln(1 + S):
+порядок тот же, ноль - нет добавлений. Добавление меняет оценку тем же
+UPDATE, что и счётчики (recipes/signals.py), через ln(e^a + e^b)
+в SQL, а recompute_popularity пересчитывает её целиком и убирает
+накопленную ошибку округления.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Exp, Greatest, Least, Ln
+
+from .models import FavoriteRecipe, Recipe, ShoppingCartRecipe
+
+SOURCES = {
+    FavoriteRecipe: 'favorite',
+    ShoppingCartRecipe: 'shopping_cart',
+}
+# Ограничения аргументов EXP и LN: PostgreSQL не округляет до нуля,
+# а выдаёт ошибку.
+MIN_EXPONENT = -700.0
+MIN_FRACTION = 1e-300
+
+if settings.RECIPE_POPULARITY_HALF_LIFE_DAYS <= 0 or any(
+    weight <= 0 for weight in settings.RECIPE_POPULARITY_WEIGHTS.values()
+):
+    raise ImproperlyConfigured(
+        'RECIPE_POPULARITY_HALF_LIFE_DAYS и RECIPE_POPULARITY_WEIGHTS '
+        'должны быть положительными.'
+    )
+
+
+def get_score(model, created_at):
+    """ln вклада добавления в S."""
+
+    days = (
+        created_at - settings.RECIPE_POPULARITY_EPOCH
+    ).total_seconds() / (24 * 60 * 60)
+    return math.log(
+        settings.RECIPE_POPULARITY_WEIGHTS[SOURCES[model]]
+    ) + days / settings.RECIPE_POPULARITY_HALF_LIFE_DAYS * math.log(2)
+
+
+def log_add(first, second):
+    """ln(e^first + e^second) без переполнения."""
+
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def add_score(score):
+    popularity = F('popularity')
+    high = Greatest(popularity, Value(score))
+    low = Least(popularity, Value(score))
+    return high + Ln(
+        Value(1.0) + Exp(Greatest(low - high, Value(MIN_EXPONENT)))
+    )
+
+
+def subtract_score(score):
+    popularity = F('popularity')
+    fraction = Value(1.0) - Exp(Greatest(
+        Least(Value(score) - popularity, Value(0.0)), Value(MIN_EXPONENT)
+    ))
+    return Case(
+        # Удаляется последнее добавление: разность двух близких чисел
+        # тонет в ошибке округления, оценка - ровно ноль.
+        When(
+            Q(favorites_count__lte=1, shopping_cart_count=0)
+            | Q(favorites_count=0, shopping_cart_count__lte=1),
+            then=Value(0.0)
+        ),
+        # Разошедшаяся с данными оценка не уходит ниже нуля.
+        default=Greatest(
+            popularity + Ln(Greatest(fraction, Value(MIN_FRACTION))),
+            Value(0.0)
+        )
+    )
+
+
+def get_popularity_change(instance, sign):
+    """Изменение popularity для UPDATE счётчика рецепта."""
+
+    if type(instance) not in SOURCES:
+        return {}
+
+    score = get_score(type(instance), instance.created_at)
+    return {
+        'popularity': add_score(score) if sign > 0 else subtract_score(score)
+    }
+
+
+@transaction.atomic
+def recompute_popularity(start, stop):
+    """Пересчёт оценок рецептов с pk в [start, stop)."""
+
+    # Блокировка не даёт сигналам изменить оценку между чтением
+    # добавлений и записью результата.
+    recipe_ids = list(Recipe.objects.select_for_update().filter(
+        pk__gte=start, pk__lt=stop
+    ).values_list('id', flat=True))
+    scores = defaultdict(float)
+
+    for model in SOURCES:
+        added = model.objects.filter(
+            recipe_id__gte=start, recipe_id__lt=stop
+        ).values_list('recipe_id', 'created_at')
+        for recipe_id, created_at in added.iterator():
+            scores[recipe_id] = log_add(
+                scores[recipe_id], get_score(model, created_at)
+            )
+
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, popularity=scores[recipe_id])
+            for recipe_id in recipe_ids
+        ],
+        ['popularity'],
+        batch_size=500
+    )
+
+    return len(recipe_ids)
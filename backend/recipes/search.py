@@ -0,0 +1,253 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from threading import Lock
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              IntegerField, OuterRef, Subquery, Value, When)
+from django.db.models.functions import Cast, NullIf
+
+from .cache import bump_versions, get_version, get_versions
+from .models import Ingredient, Recipe, RecipesIngredients
+
+SEARCH = 'recipes:search'
+SEARCH_CONFIG = 'russian'
+
+# Веса как у ts_rank по умолчанию: A - название, B - описание,
+# C - ингредиенты.
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+WORD = re.compile(r'\w+')
+
+
+class IngredientIndex:
+    """Неизменяемый отсортированный индекс ингредиентов.
+
+    Сначала отдаёт совпадения по началу названия (бинарный поиск),
+    затем — по вхождению подстроки (поиск по склеенным названиям).
+    """
+
+    _current = None
+    _lock = Lock()
+
+    def __init__(self, ingredients, version=None):
+        self.version = version
+        self.ingredients = tuple(sorted(
+            ingredients, key=lambda item: (item.name.lower(), item.id)
+        ))
+        self.keys = tuple(item.name.lower() for item in self.ingredients)
+        self.offsets = []
+        offset = 0
+        for key in self.keys:
+            self.offsets.append(offset)
+            offset += len(key) + 1
+        self.haystack = '\n'.join(self.keys)
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    @staticmethod
+    def normalize(query, limit=None):
+        if limit is not None and limit <= 0:
+            limit = None
+        return query.strip().lower().replace('\n', ' '), limit
+
+    def search(self, query, limit=None):
+        query, limit = self.normalize(query, limit)
+        if not query:
+            return []
+
+        start = bisect_left(self.keys, query)
+        end = bisect_left(self.keys, query + '\uffff', start)
+        result = list(self.ingredients[start:end][:limit])
+
+        position = self.haystack.find(query)
+        while position != -1 and (limit is None or len(result) < limit):
+            index = bisect_right(self.offsets, position) - 1
+            if not start <= index < end:
+                result.append(self.ingredients[index])
+            if index + 1 == len(self.offsets):
+                break
+            position = self.haystack.find(query, self.offsets[index + 1])
+
+        return result
+
+    @classmethod
+    def get(cls):
+        # Версия читается на каждый запрос: индекс перестраивается, когда
+        # ингредиенты изменил любой воркер (с локальным кэшем - не позже
+        # CACHE_VERSION_TIMEOUT).
+        version = get_version(Ingredient)
+        index = cls._current
+        if index is not None and index.version == version:
+            return index
+
+        with cls._lock:
+            if cls._current is None or cls._current.version != version:
+                cls._current = cls(Ingredient.objects.all(), version)
+            return cls._current
+
+
+class RecipeIndex:
+    """Инвертированный индекс рецептов для баз без полнотекстового поиска.
+
+    Используется вместо search_vector на SQLite (локальные и тестовые
+    запуски). Слова сравниваются по началу, окончание длинных слов
+    запроса отбрасывается - грубая замена морфологии PostgreSQL.
+    """
+
+    _current = None
+    _lock = Lock()
+
+    def __init__(self, recipes, ingredients, version=None):
+        self.version = version
+        postings = defaultdict(lambda: defaultdict(float))
+        for recipe_id, name, text in recipes:
+            self.add(postings, recipe_id, name, WEIGHTS['A'])
+            self.add(postings, recipe_id, text, WEIGHTS['B'])
+        for recipe_id, name in ingredients:
+            self.add(postings, recipe_id, name, WEIGHTS['C'])
+        self.words = tuple(sorted(postings))
+        self.postings = {word: dict(postings[word]) for word in self.words}
+
+    @staticmethod
+    def add(postings, recipe_id, text, weight):
+        for word in WORD.findall(text.lower()):
+            postings[word][recipe_id] += weight
+
+    def match(self, word):
+        if len(word) > 4:
+            word = word[:max(4, len(word) - 2)]
+        ranks = defaultdict(float)
+        start = bisect_left(self.words, word)
+        end = bisect_left(self.words, word + '\uffff', start)
+        for found in self.words[start:end]:
+            for recipe_id, rank in self.postings[found].items():
+                ranks[recipe_id] += rank
+        return ranks
+
+    def search(self, query, limit=None):
+        """Рецепты, где есть все слова запроса: {id: ранг}."""
+        result = None
+        for word in WORD.findall(query.lower()):
+            ranks = self.match(word)
+            if result is None:
+                result = ranks
+            else:
+                result = {
+                    recipe_id: rank + ranks[recipe_id]
+                    for recipe_id, rank in result.items()
+                    if recipe_id in ranks
+                }
+        if not result:
+            return {}
+        return dict(sorted(
+            result.items(), key=lambda item: item[1], reverse=True
+        )[:limit])
+
+    @classmethod
+    def get(cls):
+        version = get_versions([SEARCH])[0]
+        if cls._current is not None and cls._current.version == version:
+            return cls._current
+
+        with cls._lock:
+            if cls._current is None or cls._current.version != version:
+                cls._current = cls(
+                    Recipe.objects.values_list('id', 'name', 'text'),
+                    RecipesIngredients.objects.values_list(
+                        'recipe_id', 'ingredient__name'
+                    ),
+                    version
+                )
+            return cls._current
+
+
+def has_search_vector():
+    return connection.vendor == 'postgresql'
+
+
+def get_search_vector():
+    ingredients = RecipesIngredients.objects.filter(
+        recipe=OuterRef('pk')
+    ).values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Subquery(ingredients), weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Пересчёт search_vector после изменения рецептов или ингредиентов."""
+    if has_search_vector():
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            search_vector=get_search_vector()
+        )
+    else:
+        transaction.on_commit(lambda: bump_versions([SEARCH]))
+
+
+def search_recipes(queryset, query, limit):
+    """Рецепты по запросу, отсортированные по рангу (annotate rank)."""
+    if has_search_vector():
+        query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date')
+
+    ranks = RecipeIndex.get().search(query, limit)
+    if not ranks:
+        return queryset.none()
+
+    return queryset.filter(pk__in=list(ranks)).annotate(rank=Case(
+        *(When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()),
+        output_field=FloatField()
+    )).order_by('-rank', '-pub_date')
+
+
+def find_cookable(queryset, ingredient_ids, max_missing=None,
+                  cooking_time=None):
+    """Рецепты, в которых есть хотя бы один из ингредиентов пользователя.
+
+    Выборка идёт от индекса (ingredient, recipe), поэтому затрагивает
+    только рецепты с этими ингредиентами. Доля имеющихся ингредиентов
+    считается по денормализованному Recipe.ingredients_count.
+    """
+    queryset = queryset.filter(
+        recipe_ingredient__ingredient__in=ingredient_ids
+    ).annotate(
+        matched=Count('recipe_ingredient')
+    ).annotate(
+        missing_count=ExpressionWrapper(
+            F('ingredients_count') - F('matched'),
+            output_field=IntegerField()
+        ),
+        coverage=ExpressionWrapper(
+            # Разошедшийся счётчик может быть нулём: деление на NULL
+            # вместо ошибки на PostgreSQL.
+            Cast('matched', FloatField()) / NullIf(
+                F('ingredients_count'), 0
+            ),
+            output_field=FloatField()
+        ),
+    )
+
+    if max_missing is not None:
+        queryset = queryset.filter(missing_count__lte=max_missing)
+    if cooking_time is not None:
+        queryset = queryset.filter(cooking_time__lte=cooking_time)
+
+    return queryset.order_by(
+        F('coverage').desc(nulls_last=True), 'missing_count', '-pub_date',
+        '-id'
+    )
@@ -1,12 +1,16 @@
-from drf_extra_fields.fields import Base64ImageField
-
 from rest_framework.exceptions import ValidationError
 from rest_framework import serializers
 
-from django.db import IntegrityError
+from django.core.files.storage import default_storage
+from django.db import transaction
 
 from users.mixins import IsSubscribedMixin
 from users.models import CustomUser as User
+from .counters import recount_counter
+from .fields import Base64ImageField
+from .images import process_recipe_image
+from .search import update_search_vectors
+from .tasks import enqueue
 from .models import (
     Ingredient, Recipe, Tag,
     RecipesIngredients,
@@ -14,6 +18,28 @@ from .models import (
 )
 
 
+class ThumbnailsField(serializers.ReadOnlyField):
+    """Ссылки на миниатюры изображения рецепта."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image_variants'
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+
+        for size, paths in variants.items():
+            urls[size] = {}
+            for extension, path in paths.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[size][extension] = url
+
+        return urls
+
+
 class AuthorSerializer(
     serializers.ModelSerializer,
     IsSubscribedMixin
@@ -86,6 +112,7 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField(
         max_length=None, use_url=True,
     )
+    thumbnails = ThumbnailsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -98,19 +125,28 @@ class GetRecipeSerializer(serializers.ModelSerializer):
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
+            'favorites_count',
             'name',
             'image',
+            'thumbnails',
             'text',
             'cooking_time'
         )
         extra_kwargs = {
             'id': {'read_only': True},
+            'favorites_count': {'read_only': True},
             'is_favorited': {'read_only': True},
             'is_in_shopping_cart': {'read_only': True}
         }
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+
+        return super().to_representation(instance)
+
     def get_ingredients(self, data):
-        ingredients = RecipesIngredients.objects.filter(recipe=data)
+        ingredients = data.recipe_ingredient.all()
 
         return RecipeIngredientSerializer(ingredients, many=True).data
 
@@ -120,12 +156,11 @@ class GetRecipeSerializer(serializers.ModelSerializer):
         if request is None or request.user.is_anonymous:
             return False
 
-        if FavoriteRecipe.objects.filter(
-                recipe=data, user=request.user).exists():
-
-            return True
+        if hasattr(data, 'is_favorited'):
+            return data.is_favorited
 
-        return False
+        return FavoriteRecipe.objects.filter(
+            recipe=data, user=request.user).exists()
 
     def get_is_in_shopping_cart(self, data):
         request = self.context.get('request')
@@ -133,12 +168,11 @@ class GetRecipeSerializer(serializers.ModelSerializer):
         if request is None or request.user.is_anonymous:
             return False
 
-        if ShoppingCartRecipe.objects.filter(
-                recipe=data, user=request.user).exists():
-
-            return True
+        if hasattr(data, 'is_in_shopping_cart'):
+            return data.is_in_shopping_cart
 
-        return False
+        return ShoppingCartRecipe.objects.filter(
+            recipe=data, user=request.user).exists()
 
 
 class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
@@ -169,64 +203,151 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
             'id': {'read_only': True},
         }
 
-    def create(self, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
+    def validate_ingredients(self, ingredients):
+        ingredient_ids = [item['id'] for item in ingredients]
+
+        if len(ingredient_ids) != len(set(ingredient_ids)):
+            raise ValidationError('Ингредиенты не должны повторяться!')
 
-        try:
-            recipe = Recipe.objects.create(
-                **validated_data,
-                author=self.context.get('request').user
+        missing_ids = set(ingredient_ids) - set(
+            Ingredient.objects.in_bulk(ingredient_ids)
+        )
+        if missing_ids:
+            raise ValidationError(
+                'Ингредиенты не найдены: '
+                f'{", ".join(map(str, sorted(missing_ids)))}.'
             )
-        except IntegrityError:
-            pass
 
-        for ingredient in ingredients:
-            ingredient_model = Ingredient.objects.get(id=ingredient['id'])
-            RecipesIngredients.objects.create(
+        return ingredients
+
+    @staticmethod
+    def create_ingredients(recipe, ingredients):
+        RecipesIngredients.objects.bulk_create(
+            RecipesIngredients(
                 recipe=recipe,
-                ingredient=ingredient_model,
+                ingredient_id=ingredient['id'],
                 amount=ingredient['amount']
             )
+            for ingredient in ingredients
+        )
+
+    def update_ingredients(self, recipe, ingredients):
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredient.all()
+        }
 
+        removed_ids = current.keys() - amounts.keys()
+        if removed_ids:
+            # Одним DELETE без post_delete на каждую строку: счётчик,
+            # поисковый вектор и ленту update() обновляет для рецепта
+            # целиком, как и после bulk_create.
+            removed = RecipesIngredients.objects.filter(
+                recipe=recipe, ingredient_id__in=removed_ids
+            )
+            removed._raw_delete(removed.db)
+
+        changed = []
+        for ingredient_id in current.keys() & amounts.keys():
+            recipe_ingredient = current[ingredient_id]
+            if recipe_ingredient.amount != amounts[ingredient_id]:
+                recipe_ingredient.amount = amounts[ingredient_id]
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipesIngredients.objects.bulk_update(changed, ['amount'])
+
+        self.create_ingredients(recipe, [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ])
+
+    @transaction.atomic
+    def create(self, validated_data):
+        tags = validated_data.pop('tags')
+        ingredients = validated_data.pop('ingredients')
+
+        recipe = Recipe(
+            **validated_data,
+            author=self.context.get('request').user,
+            ingredients_count=len(ingredients)
+        )
+        # Поисковый вектор строится ниже, уже с ингредиентами.
+        recipe.defer_search_update = True
+        recipe.save(force_insert=True)
+        self.create_ingredients(recipe, ingredients)
+        update_search_vectors([recipe.id])
         recipe.tags.set(tags)
+        enqueue(process_recipe_image, recipe.id)
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.image = validated_data.get('image', instance.image)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time)
-        instance.save()
-
-        recipe = instance
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
 
-        RecipesIngredients.objects.filter(recipe=recipe).delete()
+        if tags is not None or ingredients is not None:
+            validated_data['neighbors_stale'] = True
+        # Только изменённые поля: счётчики, popularity и image_variants
+        # меняются отдельными UPDATE, полное сохранение затёрло бы их
+        # значениями, прочитанными в начале запроса.
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.defer_search_update = ingredients is not None
+        instance.save(update_fields=list(validated_data))
 
-        for ingredient in ingredients:
-            ingredient_model = Ingredient.objects.get(id=ingredient['id'])
-            RecipesIngredients.objects.create(
-                recipe=recipe,
-                ingredient=ingredient_model,
-                amount=ingredient['amount']
-            )
+        if 'image' in validated_data:
+            enqueue(process_recipe_image, instance.id)
 
-        recipe.tags.set(tags)
+        if ingredients is not None:
+            self.update_ingredients(instance, ingredients)
+            recount_counter(Recipe, instance.id, 'ingredients_count')
+            update_search_vectors([instance.id])
 
-        return super().update(recipe, validated_data)
+        if tags is not None:
+            instance.tags.set(tags)
+
+        return instance
+
+
+class WhatToCookSerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+    cooking_time = serializers.IntegerField(min_value=1, required=False)
+
+
+class CookableRecipeSerializer(GetRecipeSerializer):
+    """Рецепт с долей имеющихся у пользователя ингредиентов."""
+
+    coverage = serializers.FloatField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+
+    class Meta(GetRecipeSerializer.Meta):
+        fields = GetRecipeSerializer.Meta.fields + (
+            'coverage', 'missing_count'
+        )
 
 
 class GetShortRecipeSerializer(serializers.ModelSerializer):
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'thumbnails',
             'cooking_time'
         )
 
@@ -0,0 +1,176 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from users.models import CustomUser as User, Subscribers
+
+from .cache import bump_version, invalidate_feed, invalidate_recipes_feed
+from .counters import change_counter
+from .popularity import get_popularity_change
+from .search import update_search_vectors
+from .tasks import enqueue
+from .timeline import clear_timeline, fan_out_recipe, fill_timeline
+from .models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipesIngredients, RecipesTags,
+    ShoppingCartRecipe, Tag
+)
+
+RECIPE_COUNTERS = {
+    FavoriteRecipe: 'favorites_count',
+    ShoppingCartRecipe: 'shopping_cart_count',
+    RecipesIngredients: 'ingredients_count',
+}
+FEED_AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def bump_catalog_version(sender, **kwargs):
+    bump_version(sender)
+    invalidate_feed(everything=True)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_search(instance, created, **kwargs):
+    if not created:
+        update_search_vectors(
+            Recipe.objects.filter(ingredients=instance).values('id')
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search(instance, update_fields, **kwargs):
+    # Сериализатор пересчитывает вектор сам после записи ингредиентов.
+    if getattr(instance, 'defer_search_update', False):
+        return
+    if update_fields and not {'name', 'text'} & set(update_fields):
+        return
+
+    update_search_vectors([instance.id])
+
+
+@receiver((post_save, post_delete), sender=RecipesIngredients)
+def update_recipes_ingredient_search(instance, **kwargs):
+    update_search_vectors([instance.recipe_id])
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCartRecipe)
+@receiver(post_save, sender=RecipesIngredients)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], 1,
+            neighbors_stale=True, **get_popularity_change(instance, 1)
+        )
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCartRecipe)
+@receiver(post_delete, sender=RecipesIngredients)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    change_counter(
+        Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1,
+        neighbors_stale=True, **get_popularity_change(instance, -1)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_saved_recipe(instance, created, **kwargs):
+    tag_ids = [] if created else list(
+        instance.tags.values_list('id', flat=True)
+    )
+    invalidate_feed([instance.author_id], tag_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_created_recipe(instance, created, **kwargs):
+    if created:
+        enqueue(fan_out_recipe, instance.id)
+
+
+@receiver(post_save, sender=Subscribers)
+def fill_subscription_timeline(instance, created, **kwargs):
+    if created:
+        enqueue(fill_timeline, instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribers)
+def clear_subscription_timeline(instance, **kwargs):
+    clear_timeline(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_deleted_recipe(instance, **kwargs):
+    invalidate_feed([instance.author_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        invalidate_recipes_feed(
+            pk_set or instance.recipe_set.values_list('id', flat=True),
+            [instance.id]
+        )
+    else:
+        invalidate_feed(
+            [instance.author_id],
+            pk_set or list(instance.tags.values_list('id', flat=True))
+        )
+
+
+@receiver((post_save, post_delete), sender=RecipesTags)
+def invalidate_recipes_tag(instance, **kwargs):
+    invalidate_recipes_feed([instance.recipe_id], [instance.tag_id])
+
+
+@receiver((post_save, post_delete), sender=RecipesIngredients)
+def invalidate_recipes_ingredient(instance, **kwargs):
+    invalidate_recipes_feed([instance.recipe_id])
+
+
+@receiver(pre_save, sender=User)
+def check_author_changed(instance, update_fields, **kwargs):
+    # Ленту меняет только правка показанных в ней полей автора рецептов
+    # (AuthorSerializer), а не смена пароля или last_login.
+    instance.feed_changed = False
+    if instance._state.adding or not instance.recipes_count:
+        return
+
+    fields = FEED_AUTHOR_FIELDS
+    if update_fields is not None:
+        fields = fields & set(update_fields)
+    if not fields:
+        return
+
+    saved = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance.feed_changed = saved is not None and any(
+        saved[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(instance, **kwargs):
+    if not getattr(instance, 'feed_changed', False):
+        return
+
+    invalidate_feed(
+        [instance.id],
+        set(RecipesTags.objects.filter(
+            recipe__author=instance
+        ).values_list('tag_id', flat=True))
+    )
@@ -0,0 +1,167 @@
+"""Похожие рецепты.
+
+Сходство двух рецептов - взвешенная сумма косинусных мер по двум
+разреженным матрицам: совместной встречаемости в избранном и списках
+покупок одних и тех же пользователей и общих тегов и ингредиентов
+(с весом idf). Команда build_recipe_similarity сохраняет top-K соседей
+каждого рецепта в RecipeSimilarity, API читает готовую таблицу.
+
+Без --full пересчитываются только рецепты с neighbors_stale и рецепты,
+в соседях которых они есть.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .models import (FavoriteRecipe, Recipe, RecipeSimilarity,
+                     RecipesIngredients, RecipesTags, ShoppingCartRecipe)
+
+# Вклад действий пользователя в совместную встречаемость.
+INTERACTION_WEIGHTS = {FavoriteRecipe: 1.0, ShoppingCartRecipe: 0.5}
+TAG_WEIGHT = 0.5
+
+
+def load_pairs(model, *fields):
+    pairs = np.array(
+        list(model.objects.values_list(*fields).iterator()), dtype=np.int64
+    )
+    return pairs.reshape(-1, 2)
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(
+        np.asarray(matrix.multiply(matrix).sum(axis=1))
+    ).ravel()
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+class SimilarityModel:
+    """Нормированные матрицы признаков всех рецептов."""
+
+    def __init__(self):
+        self.recipe_ids = np.array(
+            Recipe.objects.order_by('id').values_list('id', flat=True),
+            dtype=np.int64
+        )
+        self.collaborative = normalize_rows(self.get_interactions())
+        self.content = normalize_rows(self.get_features())
+        # Для умножения блока строк на все рецепты.
+        self.collaborative_t = self.collaborative.T.tocsr()
+        self.content_t = self.content.T.tocsr()
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def get_matrix(self, pairs, weights):
+        """Рецепты x признаки из пар (рецепт, признак)."""
+
+        # Рецепты, созданные после чтения списка, войдут в следующий расчёт.
+        known = np.isin(pairs[:, 0], self.recipe_ids)
+        rows = np.searchsorted(self.recipe_ids, pairs[known, 0])
+        features, columns = np.unique(pairs[known, 1], return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (weights[known], (rows, columns.ravel())),
+            shape=(len(self), max(len(features), 1))
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def get_interactions(self):
+        """Рецепты x пользователи, избранное и корзина суммируются."""
+
+        pairs, weights = [], []
+        for model, weight in INTERACTION_WEIGHTS.items():
+            model_pairs = load_pairs(model, 'recipe_id', 'user_id')
+            pairs.append(model_pairs)
+            weights.append(np.full(len(model_pairs), weight))
+
+        return self.get_matrix(np.concatenate(pairs), np.concatenate(weights))
+
+    def get_features(self):
+        tags = load_pairs(RecipesTags, 'recipe_id', 'tag_id')
+        ingredients = load_pairs(
+            RecipesIngredients, 'recipe_id', 'ingredient_id'
+        )
+        # Теги и ингредиенты - разные столбцы при совпадении id.
+        ingredients[:, 1] = -ingredients[:, 1] - 1
+        matrix = self.get_matrix(
+            np.concatenate((tags, ingredients)),
+            np.concatenate((
+                np.full(len(tags), TAG_WEIGHT), np.ones(len(ingredients))
+            ))
+        )
+
+        # Редкий ингредиент говорит о сходстве больше, чем соль.
+        frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + len(self)) / (1 + frequency)) + 1
+        return matrix.dot(sparse.diags(idf)).tocsr()
+
+    def get_scores(self, positions):
+        weight = settings.RECIPE_SIMILARITY_COLLABORATIVE_WEIGHT
+        scores = (
+            self.collaborative[positions].dot(self.collaborative_t) * weight
+            + self.content[positions].dot(self.content_t) * (1 - weight)
+        )
+        return scores.tocsr()
+
+    def get_neighbors(self, recipe_ids, size):
+        """Пары (рецепт, [(сосед, сходство), ...]) для recipe_ids."""
+
+        positions = np.searchsorted(self.recipe_ids, recipe_ids)
+        scores = self.get_scores(positions)
+
+        for row, position in enumerate(positions):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            columns = scores.indices[start:end]
+            values = scores.data[start:end]
+            keep = (columns != position) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            if len(values) > size:
+                top = np.argpartition(-values, size)[:size]
+                columns, values = columns[top], values[top]
+
+            yield int(self.recipe_ids[position]), list(zip(
+                self.recipe_ids[columns].tolist(), values.tolist()
+            ))
+
+
+def get_stale_recipe_ids():
+    stale = Recipe.objects.filter(neighbors_stale=True).values('id')
+    return sorted(
+        set(stale.values_list('id', flat=True))
+        | set(RecipeSimilarity.objects.filter(
+            similar__in=stale
+        ).values_list('recipe_id', flat=True))
+    )
+
+
+@transaction.atomic
+def save_neighbors(neighbors):
+    recipe_ids = [recipe_id for recipe_id, _ in neighbors]
+    Recipe.objects.filter(pk__in=recipe_ids).update(neighbors_stale=False)
+    RecipeSimilarity.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSimilarity.objects.bulk_create(
+        RecipeSimilarity(recipe_id=recipe_id, similar_id=similar_id,
+                         score=score)
+        for recipe_id, similar in neighbors
+        for similar_id, score in similar
+    )
+
+
+def build_neighbors(full=False, size=None, batch_size=500):
+    """Пересчёт соседей, возвращает число пересчитанных рецептов."""
+
+    size = size or settings.RECIPE_SIMILAR_SIZE
+    model = SimilarityModel()
+    recipe_ids = model.recipe_ids if full else np.intersect1d(
+        np.array(get_stale_recipe_ids(), dtype=np.int64), model.recipe_ids
+    )
+
+    for start in range(0, len(recipe_ids), batch_size):
+        save_neighbors(list(model.get_neighbors(
+            recipe_ids[start:start + batch_size], size
+        )))
+
+    return len(recipe_ids)
@@ -0,0 +1,65 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+from backend.metrics import TASK_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+class SyncQueue:
+    """Выполнение задач сразу, в текущем потоке."""
+
+    def submit(self, func, *args):
+        func(*args)
+
+    def qsize(self):
+        return 0
+
+
+class ThreadPoolQueue:
+    """Фоновое выполнение задач в пуле потоков текущего процесса."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.TASK_QUEUE_WORKERS,
+            thread_name_prefix='recipes-tasks'
+        )
+        self.lock = Lock()
+        self.pending = 0
+
+    def submit(self, func, *args):
+        with self.lock:
+            self.pending += 1
+        TASK_QUEUE_DEPTH.inc()
+        self.executor.submit(self.run, func, *args)
+
+    def run(self, func, *args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Ошибка фоновой задачи %s', func.__name__)
+        finally:
+            close_old_connections()
+            with self.lock:
+                self.pending -= 1
+            TASK_QUEUE_DEPTH.dec()
+
+    def qsize(self):
+        return self.pending
+
+
+@lru_cache(maxsize=None)
+def get_task_queue():
+    return import_string(settings.TASK_QUEUE)()
+
+
+def enqueue(func, *args):
+    """Постановка задачи в очередь после коммита текущей транзакции."""
+
+    transaction.on_commit(lambda: get_task_queue().submit(func, *args))
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import CustomUser as User, Subscribers
+
+from .models import (FavoriteRecipe, Ingredient, Recipe, RecipesIngredients,
+                     ShoppingCartRecipe, Tag)
+
+
+class RecipeListQueriesTest(TestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='reader', email='reader@foodgram.ru',
+            first_name='Reader', last_name='Reader'
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'tag-{number}', slug=f'tag-{number}',
+                color=f'#00000{number}'
+            )
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient-{number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def create_recipes(self, count):
+        for number in range(count):
+            author = User.objects.create(
+                username=f'author-{number}',
+                email=f'author-{number}@foodgram.ru',
+                first_name='Author', last_name=str(number)
+            )
+            recipe = Recipe.objects.create(
+                name=f'recipe-{number}', text='text', author=author,
+                image='recipes/test.png', cooking_time=10,
+                ingredients_count=len(self.ingredients)
+            )
+            recipe.tags.set(self.tags)
+            RecipesIngredients.objects.bulk_create(
+                RecipesIngredients(recipe=recipe, ingredient=ingredient)
+                for ingredient in self.ingredients
+            )
+            FavoriteRecipe.objects.create(user=self.user, recipe=recipe)
+            ShoppingCartRecipe.objects.create(user=self.user, recipe=recipe)
+            Subscribers.objects.create(user=self.user, author=author)
+
+    def assert_list_queries(self, client, queries):
+        for count in (3, 12):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                User.objects.exclude(pk=self.user.pk).delete()
+                cache.clear()
+                self.create_recipes(count)
+
+                with self.assertNumQueries(queries):
+                    response = client.get('/api/recipes/')
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.data['results']), min(count, 6)
+                )
+
+    def test_anonymous(self):
+        # Id тегов для ключа кэша ленты (кэш пуст), COUNT, рецепты
+        # с авторами, теги, ингредиенты.
+        self.assert_list_queries(APIClient(), 5)
+
+    def test_authenticated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        # Флаги избранного, корзины и подписки - подзапросы EXISTS.
+        self.assert_list_queries(client, 4)
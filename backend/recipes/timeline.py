@@ -0,0 +1,123 @@
+"""Лента рецептов от авторов, на которых подписан пользователь.
+
+Новый рецепт фоновой задачей раскладывается в ленты подписчиков
+автора (TimelineEntry), пачками по TIMELINE_FANOUT_BATCH_SIZE. Рецепты
+авторов, у которых подписчиков не меньше TIMELINE_CELEBRITY_FOLLOWERS,
+не раскладываются: при чтении лента добирает их из Recipe и сливает
+с записями ленты по (pub_date, id).
+
+Рецепты, опубликованные, пока у автора было много подписчиков, выпадают
+из лент, если подписчиков стало меньше порога; rebuild_timelines
+раскладывает их заново.
+"""
+from django.conf import settings
+
+from users.models import CustomUser as User, Subscribers
+
+from .models import Recipe, TimelineEntry
+from .pagination import keyset_filter
+
+
+def is_celebrity(followers_count):
+    return followers_count >= settings.TIMELINE_CELEBRITY_FOLLOWERS
+
+
+def get_follower_batches(author_id):
+    """Подписчики автора пачками, без OFFSET."""
+
+    followers = Subscribers.objects.filter(
+        author_id=author_id
+    ).order_by('id').values_list('id', 'user_id')
+    last_id = 0
+
+    while True:
+        batch = list(
+            followers.filter(id__gt=last_id)[
+                :settings.TIMELINE_FANOUT_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        yield [user_id for _, user_id in batch]
+
+
+def get_recent_recipes(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id
+    ).order_by('-pub_date').values_list(
+        'id', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_SIZE])
+
+
+def add_entries(user_ids, author_id, recipes):
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id, recipe_id=recipe_id,
+                author_id=author_id, pub_date=pub_date
+            )
+            for user_id in user_ids
+            for recipe_id, pub_date in recipes
+        ),
+        batch_size=settings.TIMELINE_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out_recipe(recipe_id):
+    """Задача: новый рецепт в ленты подписчиков автора."""
+
+    recipe = Recipe.objects.filter(pk=recipe_id).values_list(
+        'author_id', 'pub_date', 'author__followers_count'
+    ).first()
+    if recipe is None:
+        return
+
+    author_id, pub_date, followers_count = recipe
+    if is_celebrity(followers_count):
+        return
+
+    for user_ids in get_follower_batches(author_id):
+        add_entries(user_ids, author_id, [(recipe_id, pub_date)])
+
+
+def fill_timeline(user_id, author_id):
+    """Задача: последние рецепты автора в ленту нового подписчика."""
+
+    followers_count = User.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    if followers_count is None or is_celebrity(followers_count):
+        return
+
+    # Подписку могли отменить до выполнения задачи.
+    if Subscribers.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).exists():
+        add_entries([user_id], author_id, get_recent_recipes(author_id))
+
+
+def clear_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def get_timeline(user, position, limit):
+    """Позиции (pub_date, id) рецептов ленты после курсора."""
+
+    entries = keyset_filter(
+        TimelineEntry.objects.filter(user=user), position, 'recipe_id'
+    ).values_list('pub_date', 'recipe_id')[:limit]
+    celebrities = Subscribers.objects.filter(
+        user=user,
+        author__followers_count__gte=settings.TIMELINE_CELEBRITY_FOLLOWERS
+    ).values('author')
+    pulled = keyset_filter(
+        Recipe.objects.filter(author__in=celebrities), position
+    ).values_list('pub_date', 'id')[:limit]
+
+    # Рецепт автора, набравшего подписчиков после публикации, есть
+    # в обоих источниках.
+    return sorted(set(entries) | set(pulled), reverse=True)[:limit]
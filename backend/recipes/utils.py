@@ -0,0 +1,50 @@
+import csv
+import json
+
+
+SHOPPING_LIST_TITLE = 'Список покупок с сайта Foodgram:'
+
+
+class Echo:
+    """Псевдо-буфер для построчной записи csv."""
+
+    def write(self, value):
+        return value
+
+
+def shopping_list_txt(buy_list):
+    yield f'{SHOPPING_LIST_TITLE}\n\n'
+
+    for item in buy_list:
+        yield (
+            f'{item["name"]}, {item["amount"]} '
+            f'{item["measurement_unit"]}\n'
+        )
+
+
+def shopping_list_csv(buy_list):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+
+    for item in buy_list:
+        yield writer.writerow(
+            (item['name'], item['amount'], item['measurement_unit'])
+        )
+
+
+def shopping_list_json(buy_list):
+    separator = ''
+    yield '['
+
+    for item in buy_list:
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ', '
+
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (shopping_list_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_list_csv, 'text/csv; charset=utf-8'),
+    'json': (shopping_list_json, 'application/json'),
+}
@@ -1,19 +1,28 @@
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.filters import SearchFilter
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Prefetch, Q, Sum
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
+from backend.metrics import CACHE_REQUESTS
+from users.models import Subscribers
 from users.permissions import IsAdminOrReadOnly
 
+from .cache import feed_cache_key, feed_namespaces, get_tag_ids
 from .filters import RecipeFilter
+from .mixins import VersionedCacheMixin
+from .pagination import KeysetPagination, RecipePagination
 from .permissions import RecipePermissions
+from .search import IngredientIndex, find_cookable
+from .timeline import get_timeline
+from .utils import SHOPPING_LIST_FORMATS
 from .serializers import (
     TagSerializer,
     FavoriteSerializer,
@@ -22,6 +31,8 @@ from .serializers import (
     ShoppingCartSerializer,
     GetShortRecipeSerializer,
     CreateUpdateRecipeSerializer,
+    CookableRecipeSerializer,
+    WhatToCookSerializer,
 )
 from .models import (
     Tag,
@@ -42,17 +53,71 @@ class RecipeViewset(ModelViewSet):
         'PATCH': CreateUpdateRecipeSerializer,
         'DELETE': CreateUpdateRecipeSerializer
     }
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_queryset(self):
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipesIngredients.objects.select_related(
+                    'ingredient'
+                )
+            )
+        ).defer('search_vector')
+        user = self.request.user
+
+        if user.is_anonymous:
+            return queryset
+
+        return queryset.annotate(
+            is_favorited=Exists(FavoriteRecipe.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+            is_in_shopping_cart=Exists(ShoppingCartRecipe.objects.filter(
+                recipe=OuterRef('pk'), user=user)),
+            is_subscribed=Exists(Subscribers.objects.filter(
+                author=OuterRef('author'), user=user)),
+        )
+
     def get_serializer_class(self):
         return self.serializer_classes.get(self.request.method)
 
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return super().list(request, *args, **kwargs)
+
+        tags = sorted(set(request.query_params.getlist('tags')))
+        author = request.query_params.get('author') or None
+        key = feed_cache_key(
+            feed_namespaces(author, get_tag_ids(tags)),
+            request.build_absolute_uri('/'),
+            tags,
+            request.query_params.get('page') or '1',
+            request.query_params.get('pagination'),
+            request.query_params.get('cursor'),
+            request.query_params.get('search'),
+            request.query_params.get('ordering'),
+        )
+        data = cache.get(key)
+
+        if data is not None:
+            CACHE_REQUESTS.labels('feed', 'hit').inc()
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        CACHE_REQUESTS.labels('feed', 'miss').inc()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.FEED_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+
+        return response
+
     def get_permissions(self):
         if self.action in [
             'add_to_favorite', 'del_favorite',
             'add_to_shopping_cart', 'del_shopping_cart',
-            'download_shopping_cart'
+            'download_shopping_cart', 'feed', 'recommended'
         ]:
             permission_classes = (IsAuthenticated,)
         else:
@@ -137,44 +202,187 @@ class RecipeViewset(ModelViewSet):
         url_path='download_shopping_cart',
     )
     def download_shopping_cart(self, request):
-        shopping_cart = ShoppingCartRecipe.objects.filter(
-            user=self.request.user
-        )
-        recipes = [item.recipe.id for item in shopping_cart]
+        file_format = request.query_params.get('file_format', 'txt')
+
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {'errors': 'Доступные форматы: '
+                           f'{", ".join(SHOPPING_LIST_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         buy_list = RecipesIngredients.objects.filter(
-            recipe__in=recipes
+            recipe__shopping_recipes__user=request.user
         ).values(
-            'ingredient'
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit')
         ).annotate(
             amount=Sum('amount')
-        )
+        ).order_by('name')
 
-        buy_list_text = 'Список покупок с сайта Foodgram:\n\n'
-        for item in buy_list:
-            ingredient = Ingredient.objects.get(pk=item['ingredient'])
-            amount = item['amount']
-            buy_list_text += (
-                f'{ingredient.name}, {amount} '
-                f'{ingredient.measurement_unit}\n'
-            )
-
-        response = HttpResponse(buy_list_text, content_type="text/plain")
+        generator, content_type = SHOPPING_LIST_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            generator(buy_list.iterator()), content_type=content_type
+        )
         response['Content-Disposition'] = (
-            'attachment; filename=shopping-list.txt'
+            f'attachment; filename=shopping-list.{file_format}'
         )
 
         return response
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='what_to_cook',
+    )
+    def what_to_cook(self, request):
+        """Рецепты по имеющимся ингредиентам, лучшие совпадения первыми."""
+
+        params = WhatToCookSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = find_cookable(
+            self.get_queryset(),
+            set(params.validated_data['ingredients']),
+            params.validated_data.get('max_missing'),
+            params.validated_data.get('cooking_time'),
+        )
 
-class TagViewSet(ModelViewSet):
+        # Курсорная пагинация сортирует по дате, здесь нужен порядок
+        # по доле ингредиентов.
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = CookableRecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые первыми."""
+
+        paginator = KeysetPagination()
+        ids = [
+            pk for _, pk in get_timeline(
+                request.user,
+                paginator.decode_cursor(request),
+                paginator.page_size + 1
+            )
+        ]
+        recipes = self.get_queryset().in_bulk(ids)
+        page = paginator.paginate_items(
+            (recipes[pk] for pk in ids if pk in recipes), request
+        )
+        serializer = self.get_serializer(page, many=True)
+
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='similar',
+    )
+    def similar(self, request, pk=None):
+        """Похожие рецепты, рассчитанные build_recipe_similarity."""
+
+        recipes = list(self.get_queryset().filter(
+            neighbor_of__recipe_id=pk
+        ).order_by('-neighbor_of__score'))
+
+        if not recipes and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+
+        serializer = self.get_serializer(recipes, many=True)
+
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='recommended',
+    )
+    def recommended(self, request):
+        """Соседи рецептов из избранного и списка покупок пользователя."""
+
+        user = request.user
+        queryset = self.get_queryset().filter(
+            Q(neighbor_of__recipe__in=FavoriteRecipe.objects.filter(
+                user=user
+            ).values('recipe'))
+            | Q(neighbor_of__recipe__in=ShoppingCartRecipe.objects.filter(
+                user=user
+            ).values('recipe')),
+            is_favorited=False,
+            is_in_shopping_cart=False,
+        ).exclude(author=user).annotate(
+            recommendation=Sum('neighbor_of__score')
+        ).order_by('-recommendation', '-pub_date')
+
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='trending',
+    )
+    def trending(self, request):
+        """Самые популярные рецепты с учётом давности добавлений."""
+
+        recipes = self.get_queryset().filter(
+            popularity__gt=0
+        ).order_by('-popularity', '-pub_date')[:settings.RECIPE_TRENDING_SIZE]
+        serializer = self.get_serializer(recipes, many=True)
+
+        return Response(serializer.data)
+
+
+class TagViewSet(VersionedCacheMixin, ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
 
 
-class IngredientsViewSet(ModelViewSet):
+class IngredientsViewSet(VersionedCacheMixin, ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (SearchFilter,)
-    search_fields = ('name',)
+
+    def get_search_query(self, request):
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+
+        return IngredientIndex.normalize(
+            request.query_params.get('name', ''), limit
+        )
+
+    def get_cache_path(self, request):
+        if not request.query_params.get('name'):
+            return super().get_cache_path(request)
+
+        # Запросы, которые поиск не различает, делят ETag и кэш.
+        name, limit = self.get_search_query(request)
+        return f'search:{limit}:{name}'
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+
+        return self.cached_response(self.search, request)
+
+    def search(self, request):
+        serializer = self.get_serializer(
+            IngredientIndex.get().search(*self.get_search_query(request)),
+            many=True
+        )
+
+        return Response(serializer.data)
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from copy import copy
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from backend.metrics import CACHE_REQUESTS
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш с ограниченным временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.items[key] = (value, monotonic() + self.ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+if settings.AUTH_TOKEN_SHARED_CACHE_TTL and not settings.SHARED_CACHE:
+    raise ImproperlyConfigured(
+        'AUTH_TOKEN_SHARED_CACHE_TTL требует общего кэша (CACHE_BACKEND): '
+        'в локальном кэше отзыв токена не виден другим воркерам.'
+    )
+
+local_tokens = LRUCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL
+)
+
+
+def get_token_cache_key(key):
+    return f'auth:token:{sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_token(key):
+    cache_key = get_token_cache_key(key)
+    local_tokens.delete(cache_key)
+    if settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+        cache.delete(cache_key)
+
+
+def invalidate_user_tokens(user):
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе на каждый запрос.
+
+    Пользователь по токену ищется в локальном LRU-кэше процесса, затем
+    в общем кэше (если AUTH_TOKEN_SHARED_CACHE_TTL > 0) и только потом
+    в базе. При выходе, смене пароля, изменении и удалении пользователя
+    записи удаляются из общего кэша и LRU текущего процесса. LRU других
+    процессов очистить нельзя: там отозванный токен принимается ещё до
+    AUTH_TOKEN_CACHE_TTL секунд.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        user = local_tokens.get(cache_key)
+        result = 'hit'
+        if user is None and settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+            user = cache.get(cache_key)
+            result = 'shared_hit'
+            if user is not None:
+                local_tokens.set(cache_key, user)
+        if user is None:
+            CACHE_REQUESTS.labels('auth_token', 'miss').inc()
+            user, token = super().authenticate_credentials(key)
+            local_tokens.set(cache_key, copy(user))
+            if settings.AUTH_TOKEN_SHARED_CACHE_TTL:
+                cache.set(
+                    cache_key, user,
+                    timeout=settings.AUTH_TOKEN_SHARED_CACHE_TTL
+                )
+            return user, token
+        CACHE_REQUESTS.labels('auth_token', result).inc()
+        # Копия, чтобы запросы в соседних потоках не меняли общий объект.
+        user = copy(user)
+        return user, Token(key=key, user=user)
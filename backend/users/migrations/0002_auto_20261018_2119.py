@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='subscribers',
+            name='unique_object',
+        ),
+        migrations.AlterField(
+            model_name='subscribers',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='Подписчик на автора рецепта', on_delete=django.db.models.deletion.CASCADE, related_name='follower', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.AddConstraint(
+            model_name='subscribers',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_object'),
+        ),
+    ]
@@ -9,10 +9,12 @@ class IsSubscribedMixin(Serializer):
 
     def get_is_subscribed(self, data):
         request = self.context.get('request')
-        print(request)
         if request is None or request.user.is_anonymous:
             return False
 
+        if hasattr(data, 'is_subscribed'):
+            return data.is_subscribed
+
         return Subscribers.objects.filter(
             author=data, user=request.user
         ).exists()
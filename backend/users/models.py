@@ -21,6 +21,12 @@ class CustomUser(AbstractUser):
         choices=ROLE_CHOICES,
         default='user',
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('username',)
@@ -46,6 +52,7 @@ class Subscribers(models.Model):
         CustomUser,
         on_delete=models.CASCADE,
         related_name='follower',
+        db_index=False,
         verbose_name='Подписчик',
         help_text='Подписчик на автора рецепта'
     )
@@ -59,7 +66,7 @@ class Subscribers(models.Model):
 
     class Meta:
         constraints = [models.UniqueConstraint(
-            fields=['author', 'user'],
+            fields=['user', 'author'],
             name='unique_object'
         )]
 
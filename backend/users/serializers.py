@@ -7,10 +7,12 @@ from rest_framework.validators import UniqueValidator
 from rest_framework import serializers
 
 from recipes.models import Recipe
-from recipes.serializers import GetRecipeSerializer
+from recipes.serializers import GetShortRecipeSerializer
 
+from .authentication import invalidate_user_tokens
 from .models import Subscribers, CustomUser as User
 from .mixins import IsSubscribedMixin
+from .utils import get_recipes_limit
 
 
 class UserSerializer(
@@ -114,6 +116,7 @@ class UserSetPasswordSerializer(serializers.ModelSerializer):
             validated_data.get('new_password')
         )
         user.save()
+        invalidate_user_tokens(user)
 
         return validated_data.get('new_password')
 
@@ -123,7 +126,6 @@ class GetSubscritionsSerializer(
     IsSubscribedMixin
 ):
 
-    recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
 
     class Meta:
@@ -145,14 +147,17 @@ class GetSubscritionsSerializer(
             'recipes': {'read_only': True},
         }
 
-    def get_recipes_count(self, data):
-        return Recipe.objects.filter(author=data).count()
-
     def get_recipes(self, data):
-        recipe = Recipe.objects.filter(author=data)[:3]
-        serializer = GetRecipeSerializer(recipe, many=True)
-
-        return serializer.data
+        if hasattr(data, 'preview_recipes'):
+            recipes = data.preview_recipes
+        else:
+            recipes = Recipe.objects.filter(author=data)[
+                :get_recipes_limit(self.context.get('request'))
+            ]
+
+        return GetShortRecipeSerializer(
+            recipes, many=True, context=self.context
+        ).data
 
 
 class UserSubscribeSerializer(serializers.ModelSerializer):
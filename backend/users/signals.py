@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.counters import change_counter
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .models import CustomUser as User, Subscribers
+
+
+@receiver(post_save, sender=Subscribers)
+def increment_followers_count(instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribers)
+def decrement_followers_count(instance, **kwargs):
+    change_counter(User, instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(instance, **kwargs):
+    """Выход через djoser и удаление пользователя удаляют токен."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user(instance, created, update_fields, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_user_tokens(instance)
@@ -0,0 +1,15 @@
+RECIPES_LIMIT_DEFAULT = 3
+
+
+def get_recipes_limit(request):
+    """Количество рецептов в превью подписки из параметра recipes_limit."""
+
+    if request is None:
+        return RECIPES_LIMIT_DEFAULT
+
+    try:
+        recipes_limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return RECIPES_LIMIT_DEFAULT
+
+    return max(recipes_limit, 0)
@@ -5,8 +5,13 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
 
+from django.db.models import (
+    BooleanField, OuterRef, Prefetch, Subquery, Value
+)
 from django.shortcuts import get_object_or_404
 
+from recipes.models import Recipe
+
 from .permissions import IsAdminOrUser, UserPermissions
 
 from .models import Subscribers, CustomUser as User
@@ -16,6 +21,7 @@ from .serializers import (
     UserSubscribeSerializer,
     UserSerializer,
 )
+from .utils import get_recipes_limit
 
 
 class UserViewSet(ModelViewSet):
@@ -81,7 +87,26 @@ class UserViewSet(ModelViewSet):
     def get_subscriptions(self, request):
         """Список подписок пользователя."""
 
-        users = User.objects.filter(followed__user=request.user)
+        preview_recipes = Recipe.objects.filter(
+            id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date').values('id')[
+                    :get_recipes_limit(request)
+                ]
+            )
+        ).defer('search_vector')
+        users = User.objects.filter(
+            followed__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch(
+                'author',
+                queryset=preview_recipes,
+                to_attr='preview_recipes'
+            )
+        )
         page = self.paginate_queryset(users)
 
         serializer = GetSubscritionsSerializer(